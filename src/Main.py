@@ -16,9 +16,18 @@ from PyQt5 import QtGui
 from PyQt5.QtWidgets import QLabel, QSizePolicy
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPainter, QColor
-from qt_thread_updater import get_updater
 from src import config as co
 from src.emotion_detector import EmotionDetector
+from src.profiles import ProfileManager
+from src.video_writer import VideoRecorder
+from src.tracing import get_tracer
+from src.motion import MotionGate
+from src.idle import IdleMonitor
+from src.thread_budget import get_thread_layout, plan_thread_budget
+from src.session_stats import SessionStats
+from src.results_index import ResultsIndexWriter
+from src.fast_classifier import format_cascade_report
+from src.view_model import ViewUpdater
 from src.utils import draw_bbox, format_emotion_result, resize_frame
 
 def text_size(frame):
@@ -52,10 +61,39 @@ class Main:
         self.start_camera = True
         
         # FPS control
-        self.target_fps = 10  # Target FPS for processing
+        self.target_fps = co.TARGET_FPS  # Target FPS for processing
+        self.source_fps = None  # FPS of the current camera/video
         self.frame_skip = 0
         self.frame_count = 0
         
+        # Session recording (annotated and/or raw stream)
+        self.record_annotated = co.RECORD_ANNOTATED
+        self.record_raw = co.RECORD_RAW
+        self.annotated_recorder = None
+        self.raw_recorder = None
+        
+        # Per-frame results index of the analyzed video (for the review player)
+        self.results_index = None
+        
+        # Motion gate (camera mode) and last analyzed results
+        self.motion_gate = MotionGate() if co.MOTION_GATE_ENABLED else None
+        self.last_results = None
+        
+        # Idle back-off (camera mode) when nobody is in front of the camera
+        self.idle_monitor = IdleMonitor() if co.IDLE_ENABLED else None
+        
+        # Running emotion statistics of the current camera/video session
+        self.session_stats = SessionStats()
+        
+        # Widget updates from the processing threads, applied once per display refresh
+        self.view = ViewUpdater(self.MainGUI)
+        self.view.bind('frame', self.set_pixmap, diff=False)
+        self.view.bind('result_text', self.MainGUI.text_result.setText)
+        self.view.bind('result_style', self.MainGUI.text_result.setStyleSheet)
+        
+        # Maximum frame size used for analysis
+        self.analysis_size = (co.ANALYSIS_MAX_WIDTH, co.ANALYSIS_MAX_HEIGHT)
+        
         # Initialize emotion detector with configurable thresholds
         model_path = co.FACIAL_EXPRESSION_MODEL if os.path.exists(co.FACIAL_EXPRESSION_MODEL) else None
         self.emotion_detector = EmotionDetector(
@@ -63,9 +101,19 @@ class Main:
             min_neighbors=co.FACE_DETECTION_MIN_NEIGHBORS,
             scale_factor=co.FACE_DETECTION_SCALE_FACTOR,
             min_face_size=co.FACE_DETECTION_MIN_SIZE,
-            emotion_confidence_threshold=co.EMOTION_CONFIDENCE_THRESHOLD
+            emotion_confidence_threshold=co.EMOTION_CONFIDENCE_THRESHOLD,
+            max_faces_per_frame=co.MAX_FACES_PER_FRAME,
+            cascade_threshold=co.CASCADE_THRESHOLD,
+            cascade_audit_interval=co.CASCADE_AUDIT_INTERVAL
         )
         
+        # Performance profiles (reapplied when profiles.yaml changes); the lock keeps
+        # profile switches from other threads out of a running frame analysis
+        self.analysis_lock = threading.RLock()
+        self.profile_name = co.DEFAULT_PROFILE
+        self.profile_manager = ProfileManager(co.PROFILES_FILE, on_change=self.reload_profile)
+        self.apply_profile(self.profile_name)
+        
         self.init_text_size()
 
     def img_cv_2_qt(self, img_cv):
@@ -132,54 +180,134 @@ class Main:
             self.start_camera = True
             (self.text_x, self.text_y), self.font, self.font_scale, self.text_color, self.font_thickness = text_size(frame)
     
+    def process_frame(self, frame, title_text, frame_id=None, capture_start=None, results=None, timestamp=None):
+        """
+        Run detection on a captured frame, draw the results and update the UI.
+        
+        Parameters:
+            frame (numpy.ndarray): Captured frame
+            title_text (str): Title drawn on the annotated image
+            frame_id (int): Frame ID used to label trace spans
+            capture_start (float): time.perf_counter() before the frame was captured
+            results (list): Results to reuse instead of running detection (static scene)
+            timestamp (float): Session time of the frame in seconds (default: wall clock)
+            
+        Returns:
+            list: Emotion detection results
+        """
+        tracer = get_tracer()
+        
+        # Resize frame for better performance
+        with tracer.span("resize", frame_id):
+            frame = resize_frame(frame, *self.analysis_size)
+        
+        # Detect emotions (a profile switch waits until this frame is analyzed)
+        with self.analysis_lock:
+            if results is None:
+                results = self.emotion_detector.predict(frame, frame_id=frame_id, scheduler=self.emotion_detector.face_scheduler)
+            self.last_results = results
+        self.session_stats.update(results, timestamp)
+        
+        # Draw results
+        with tracer.span("draw", frame_id):
+            image = self.emotion_detector.draw_results(frame, results)
+            
+            # Add title with FPS info
+            cv2.putText(image, title_text, 
+                       (self.text_x, self.text_y), 
+                       self.font, self.font_scale, 
+                       self.text_color, self.font_thickness)
+        
+        # Record annotated stream
+        recorder = self.annotated_recorder
+        if recorder is not None:
+            recorder.write(image)
+        
+        # Update UI
+        with tracer.span("qt_convert", frame_id):
+            pixmap = self.img_cv_2_qt(image)
+        if results:
+            self.view.post(frame=(pixmap, frame_id, capture_start),
+                           result_text=format_emotion_result(results),
+                           result_style="background-color: rgb(0, 255, 0);")
+        else:
+            self.view.post(frame=(pixmap, frame_id, capture_start),
+                           result_text="No face detected",
+                           result_style="background-color: rgb(255, 255, 0);")
+        
+        return results
+    
+    def set_pixmap(self, pixmap, frame_id=None, capture_start=None):
+        """Show a processed frame (runs on the GUI thread) and close its trace."""
+        tracer = get_tracer()
+        with tracer.span("set_pixmap", frame_id):
+            self.MainGUI.label_Image.setPixmap(pixmap)
+        if capture_start is not None:
+            tracer.add_frame(frame_id, capture_start, time.perf_counter())
+    
     def auto_camera(self):
         """Real-time emotion detection from camera."""
         url_camera = co.CAMERA_DEVICE
         self.init_devices(url_camera)
         
         # Calculate frame skip based on target FPS
-        camera_fps = 30  # Assume camera runs at 30 FPS
-        self.frame_skip = max(1, camera_fps // self.target_fps)
+        self.source_fps = 30  # Assume camera runs at 30 FPS
+        self.update_frame_skip()
         print(f"Camera FPS control: Processing every {self.frame_skip} frames (target: {self.target_fps} FPS)")
+        self.start_recording("camera")
+        self.reset_results()
+        self.session_stats.reset()
+        self.emotion_detector.cascade_stats.reset()
+        if self.idle_monitor is not None:
+            self.idle_monitor.reset()
         
+        tracer = get_tracer()
         while self.ret and self.start_camera:
             try:
-                ret, frame = self.camera.read()
+                frame_id = tracer.next_frame_id()
+                capture_start = time.perf_counter()
+                with tracer.span("capture", frame_id):
+                    ret, frame = self.camera.read()
                 self.ret = ret
                 if self.ret and self.start_camera:
                     self.frame_count += 1
                     
+                    # Record raw stream at the source frame rate
+                    recorder = self.raw_recorder
+                    if recorder is not None:
+                        recorder.write(frame)
+                    
                     # Skip frames to control FPS
                     if self.frame_count % self.frame_skip != 0:
                         continue
                     
-                    # Resize frame for better performance
-                    frame = resize_frame(frame)
-                    
-                    # Detect emotions
-                    results = self.emotion_detector.predict(frame)
-                    
-                    # Draw results
-                    image = self.emotion_detector.draw_results(frame, results)
-                    
-                    # Add title with FPS info
-                    title_text = f"Emotion Detection (FPS: {self.target_fps})"
-                    cv2.putText(image, title_text, 
-                               (self.text_x, self.text_y), 
-                               self.font, self.font_scale, 
-                               self.text_color, self.font_thickness)
+                    # Idle: only probe for faces at a low rate and at reduced resolution
+                    idle_monitor = self.idle_monitor
+                    if idle_monitor is not None and idle_monitor.idle:
+                        title_text = f"Emotion Detection (IDLE - {idle_monitor.probe_rate:g} Hz)"
+                        if not idle_monitor.probe_due():
+                            self.process_frame(frame, title_text, frame_id, capture_start, results=[])
+                            continue
+                        with tracer.span("idle_probe", frame_id):
+                            faces_present = self.idle_probe(frame)
+                        if not idle_monitor.update(faces_present):
+                            self.reset_results()
+                        else:
+                            self.process_frame(frame, title_text, frame_id, capture_start, results=[])
+                            continue
                     
-                    # Update UI
-                    get_updater().call_latest(self.MainGUI.label_Image.setPixmap, self.img_cv_2_qt(image))
+                    # Reuse the last results while the scene is static (the gate is checked on
+                    # every frame so the first analyzed frame becomes its reference)
+                    reuse_results = None
+                    if self.motion_gate is not None:
+                        with tracer.span("motion_gate", frame_id):
+                            moving = self.motion_gate.check(frame)
+                        if not moving and self.last_results is not None:
+                            reuse_results = self.last_results
                     
-                    # Update result text
-                    if results:
-                        result_text = format_emotion_result(results)
-                        get_updater().call_latest(self.MainGUI.text_result.setText, result_text)
-                        get_updater().call_latest(self.MainGUI.text_result.setStyleSheet, "background-color: rgb(0, 255, 0);")
-                    else:
-                        get_updater().call_latest(self.MainGUI.text_result.setText, "No face detected")
-                        get_updater().call_latest(self.MainGUI.text_result.setStyleSheet, "background-color: rgb(255, 255, 0);")
+                    results = self.process_frame(frame, f"Emotion Detection (FPS: {self.target_fps})", frame_id, capture_start, reuse_results)
+                    if idle_monitor is not None:
+                        idle_monitor.update(len(results) > 0)
                 else:
                     break
             except Exception as e:
@@ -193,47 +321,46 @@ class Main:
         
         # Get video FPS and calculate frame skip
         video_fps = self.camera.get(cv2.CAP_PROP_FPS)
-        self.frame_skip = max(1, int(video_fps // self.target_fps))
+        self.source_fps = video_fps
+        self.update_frame_skip()
         print(f"Video FPS control: Original FPS: {video_fps}, Processing every {self.frame_skip} frames (target: {self.target_fps} FPS)")
+        self.start_recording(os.path.splitext(os.path.basename(path_video))[0])
+        self.reset_results()
+        self.session_stats.reset()
+        self.emotion_detector.cascade_stats.reset()
+        if self.ret:
+            frame_size = (int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            self.results_index = ResultsIndexWriter(path_video, video_fps, frame_size)
         
+        tracer = get_tracer()
         while self.ret and self.start_camera:
             try:
-                ret, frame = self.camera.read()
+                frame_id = tracer.next_frame_id()
+                capture_start = time.perf_counter()
+                with tracer.span("capture", frame_id):
+                    ret, frame = self.camera.read()
                 self.ret = ret
                 if self.ret and self.start_camera:
                     self.frame_count += 1
                     
+                    # Record raw stream at the source frame rate
+                    recorder = self.raw_recorder
+                    if recorder is not None:
+                        recorder.write(frame)
+                    
                     # Skip frames to control FPS
                     if self.frame_count % self.frame_skip != 0:
                         continue
                     
-                    # Resize frame for better performance
-                    frame = resize_frame(frame)
-                    
-                    # Detect emotions
-                    results = self.emotion_detector.predict(frame)
-                    
-                    # Draw results
-                    image = self.emotion_detector.draw_results(frame, results)
-                    
-                    # Add title with FPS info
-                    title_text = f"Video Emotion Detection (FPS: {self.target_fps})"
-                    cv2.putText(image, title_text, 
-                               (self.text_x, self.text_y), 
-                               self.font, self.font_scale, 
-                               self.text_color, self.font_thickness)
+                    timestamp = self.camera.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                    results = self.process_frame(frame, f"Video Emotion Detection (FPS: {self.target_fps})", frame_id, capture_start, timestamp=timestamp)
                     
-                    # Update UI
-                    get_updater().call_latest(self.MainGUI.label_Image.setPixmap, self.img_cv_2_qt(image))
-                    
-                    # Update result text
-                    if results:
-                        result_text = format_emotion_result(results)
-                        get_updater().call_latest(self.MainGUI.text_result.setText, result_text)
-                        get_updater().call_latest(self.MainGUI.text_result.setStyleSheet, "background-color: rgb(0, 255, 0);")
-                    else:
-                        get_updater().call_latest(self.MainGUI.text_result.setText, "No face detected")
-                        get_updater().call_latest(self.MainGUI.text_result.setStyleSheet, "background-color: rgb(255, 255, 0);")
+                    # Index the results by frame number for instant seeking later
+                    results_index = self.results_index
+                    if results_index is not None:
+                        height, width = frame.shape[:2]
+                        scale = 1.0 / min(self.analysis_size[0] / width, self.analysis_size[1] / height, 1.0)
+                        results_index.add(int(self.camera.get(cv2.CAP_PROP_POS_FRAMES)) - 1, results, scale)
                 else:
                     break
             except Exception as e:
@@ -249,7 +376,7 @@ class Main:
                 return
             
             # Resize frame for better performance
-            frame = resize_frame(frame)
+            frame = resize_frame(frame, *self.analysis_size)
             
             # Detect emotions
             results = self.emotion_detector.predict(frame)
@@ -264,24 +391,87 @@ class Main:
                        self.text_color, self.font_thickness)
             
             # Update UI
-            get_updater().call_latest(self.MainGUI.label_Image.setPixmap, self.img_cv_2_qt(image))
-            
-            # Update result text
+            pixmap = self.img_cv_2_qt(image)
             if results:
-                result_text = format_emotion_result(results)
-                get_updater().call_latest(self.MainGUI.text_result.setText, result_text)
-                get_updater().call_latest(self.MainGUI.text_result.setStyleSheet, "background-color: rgb(0, 255, 0);")
+                self.view.post(frame=(pixmap, None, None),
+                               result_text=format_emotion_result(results),
+                               result_style="background-color: rgb(0, 255, 0);")
             else:
-                get_updater().call_latest(self.MainGUI.text_result.setText, "No face detected")
-                get_updater().call_latest(self.MainGUI.text_result.setStyleSheet, "background-color: rgb(255, 0, 0);")
+                self.view.post(frame=(pixmap, None, None),
+                               result_text="No face detected",
+                               result_style="background-color: rgb(255, 0, 0);")
                 
         except Exception as e:
             self.MainGUI.MessageBox_signal.emit(f"Lỗi xử lý ảnh: {str(e)}", "error")
 
+    def start_recording(self, name):
+        """
+        Start recording the annotated and/or raw stream of the current session.
+        
+        Parameters:
+            name (str): Session name used in the output file names
+        """
+        if not self.ret or not (self.record_annotated or self.record_raw):
+            return
+        
+        session = f"{name}_{time.strftime('%Y%m%d_%H%M%S')}"
+        source_fps = self.source_fps if self.source_fps and self.source_fps > 0 else 30
+        if self.record_annotated:
+            self.annotated_recorder = VideoRecorder(
+                os.path.join(co.OUTPUT_DIR, f"{session}_annotated.mp4"),
+                fps=source_fps / self.frame_skip,
+                fourcc=co.RECORD_FOURCC,
+                queue_size=co.RECORD_QUEUE_SIZE
+            )
+        if self.record_raw:
+            self.raw_recorder = VideoRecorder(
+                os.path.join(co.OUTPUT_DIR, f"{session}_raw.mp4"),
+                fps=source_fps,
+                fourcc=co.RECORD_FOURCC,
+                queue_size=co.RECORD_QUEUE_SIZE
+            )
+    
+    def stop_recording(self):
+        """Finish writing the session recordings."""
+        for recorder in (self.annotated_recorder, self.raw_recorder):
+            if recorder is not None:
+                recorder.close()
+        self.annotated_recorder = None
+        self.raw_recorder = None
+    
+    def export_session_stats(self):
+        """
+        Save the statistics of the finished session (once per session).
+        
+        Returns:
+            str: Path of the statistics file, or None if there was nothing to save
+        """
+        if self.session_stats.exported or self.session_stats.frames == 0:
+            return None
+        cascade = self.emotion_detector.cascade_report()
+        print(format_cascade_report(cascade))
+        path = os.path.join(co.OUTPUT_DIR, f"session_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        return self.session_stats.export(path, extra={'cascade': cascade})
+    
+    def dump_trace(self):
+        """
+        Save the recorded frame trace as a Chrome/Perfetto trace file.
+        
+        Returns:
+            str: Path of the trace file
+        """
+        path = os.path.join(co.OUTPUT_DIR, f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        return get_tracer().dump(path)
+    
     def close_camera(self):
         """Close camera and cleanup resources."""
         try:
             self.start_camera = False
+            self.stop_recording()
+            self.export_session_stats()
+            if self.results_index is not None:
+                self.results_index.close()
+                self.results_index = None
             if self.ret:
                 self.camera.release()
             self.camera = None
@@ -305,4 +495,77 @@ class Main:
     def set_target_fps(self, fps):
         """Set target FPS for processing."""
         self.target_fps = max(1, min(30, fps))  # Limit between 1-30 FPS
+        self.update_frame_skip()
         print(f"Target FPS set to: {self.target_fps}")
+    
+    def update_frame_skip(self):
+        """Recalculate frame skip from the source FPS and target FPS."""
+        if self.source_fps:
+            self.frame_skip = max(1, int(self.source_fps // self.target_fps))
+    
+    def reset_results(self):
+        """Forget the last results so the next frame is fully analyzed."""
+        with self.analysis_lock:
+            self.last_results = None
+            self.emotion_detector.face_scheduler.reset()
+            if self.motion_gate is not None:
+                self.motion_gate.reset()
+    
+    def idle_probe(self, frame):
+        """
+        Cheap face presence check used while idle: face detection only, on a downscaled frame.
+        
+        Parameters:
+            frame (numpy.ndarray): Captured frame
+            
+        Returns:
+            bool: True if a face was found
+        """
+        width, height = self.analysis_size
+        small = resize_frame(frame, int(width * co.IDLE_PROBE_SCALE), int(height * co.IDLE_PROBE_SCALE))
+        min_w, min_h = self.emotion_detector.min_face_size
+        min_face_size = (max(1, int(min_w * co.IDLE_PROBE_SCALE)), max(1, int(min_h * co.IDLE_PROBE_SCALE)))
+        faces = self.emotion_detector.detect_faces(small, min_face_size=min_face_size)
+        return len(faces) > 0
+    
+    def apply_profile(self, name):
+        """
+        Apply a named performance profile without reloading the model.
+        
+        Parameters:
+            name (str): Profile name from profiles.yaml
+        """
+        profile = self.profile_manager.get(name)
+        
+        # Called from the GUI or the profile watcher thread: never change the
+        # detector or reset the face tracks while a frame is being analyzed
+        with self.analysis_lock:
+            self.profile_name = name
+            
+            # Face detection / emotion thresholds
+            self.emotion_detector.scale_factor = profile['scale_factor']
+            self.emotion_detector.min_neighbors = profile['min_neighbors']
+            self.emotion_detector.min_face_size = profile['min_size']
+            self.emotion_detector.emotion_confidence_threshold = profile['emotion_confidence_threshold']
+            self.emotion_detector.face_scheduler.budget = profile['max_faces_per_frame']
+            self.emotion_detector.cascade_threshold = profile['cascade_threshold']
+            
+            # Analysis resolution and FPS
+            self.analysis_size = (profile['analysis_width'], profile['analysis_height'])
+            self.set_target_fps(profile['target_fps'])
+            self.reset_results()
+        
+        # OpenCV threads (0 = from the thread budget; TensorFlow threads are fixed at startup)
+        layout = get_thread_layout()
+        if layout is not None:
+            # Overrides are clamped to the budget left next to the startup TensorFlow threads
+            cv2.setNumThreads(plan_thread_budget(layout['cores'], opencv_threads=profile['opencv_threads'],
+                                                 tf_intra_op_threads=layout['tf_intra_op'])['opencv'])
+        else:
+            cv2.setNumThreads(profile['opencv_threads'] if profile['opencv_threads'] > 0 else -1)
+        
+        print(f"Profile applied: {name}")
+    
+    def reload_profile(self):
+        """Reapply the current profile after profiles.yaml changed."""
+        self.apply_profile(self.profile_name)
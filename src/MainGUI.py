@@ -18,8 +18,22 @@ import psutil
 from threading import Thread
 import json
 from qt_thread_updater import get_updater
-from src.Main import Main
 from src import config as co, Timer
+from src.profiles import ProfileManager
+from src.thread_budget import apply_thread_budget, format_layout
+from src.utils import format_session_summary
+from src.results_index import ResultsIndex
+
+# Split the CPU between Qt, OpenCV and TensorFlow before TensorFlow is imported
+_startup_profile = ProfileManager(co.PROFILES_FILE).get(co.DEFAULT_PROFILE)
+THREAD_LAYOUT = apply_thread_budget(
+    opencv_threads=_startup_profile['opencv_threads'],
+    tf_intra_op_threads=_startup_profile['tf_intra_op_threads'],
+    tf_inter_op_threads=_startup_profile['tf_inter_op_threads']
+)
+
+from src.Main import Main
+from src.review_player import ReviewPlayer
 
 class MainGUI(QtWidgets.QMainWindow):
     MessageBox_signal = QtCore.pyqtSignal(str, str)
@@ -35,16 +49,36 @@ class MainGUI(QtWidgets.QMainWindow):
         self.pushButton_Stop.clicked.connect(self.stop)
         self.MessageBox_signal.connect(self.MessageBox_slot)
         
+        # Performance profile selector, recording options and session statistics
+        self.init_profile_selector()
+        self.init_record_options()
+        self.init_session_view()
+        
     def start(self):
         """Initialize and start the application."""
         try: 
             self.show()
             self.Main = Main(self.ui)
+            self.update_profile_list()
+            self.Main.profile_manager.on_change = self.profiles_changed
+            self.Main.profile_manager.watch()
+            self.statusbar.showMessage(f"Threads: {format_layout(THREAD_LAYOUT)}")
+            self.bind_monitor_view()
             Timer.Timer(function=self.monitor_pc_performance, name="pc_performance", forever=True, interval=2, type="repeat").start()
         except Exception as e:
             self.MessageBox_signal.emit(str(e), "error")
             sys.exit(1)
     
+    def bind_monitor_view(self):
+        """Route the performance monitor values through the per-refresh view updates."""
+        view = self.Main.view
+        view.bind('cpu', self.progressBar_CPU.setValue)
+        view.bind('ram', self.progressBar_RAM.setValue)
+        view.bind('disk', self.progressBar_DISK.setValue)
+        view.bind('ram_text', self.ram.setText)
+        view.bind('disk_text', self.disk.setText)
+        view.bind('session_text', self.label_Session.setText)
+    
     def open_camera(self):
         """Start real-time emotion detection from camera."""
         try:
@@ -122,6 +156,8 @@ class MainGUI(QtWidgets.QMainWindow):
                     self.pushButton_Video.setStyleSheet("background-color: rgb(0, 204, 255);")
                     for item in (self.pushButton_Camera, self.pushButton_Video):
                         item.setEnabled(False)
+                for item in (self.checkBox_RecordAnnotated, self.checkBox_RecordRaw):
+                    item.setEnabled(False)
 
         elif typ == "stop":
             for item in [self.pushButton_Stop]:
@@ -129,7 +165,125 @@ class MainGUI(QtWidgets.QMainWindow):
             for item in (self.pushButton_Camera, self.pushButton_Video, self.pushButton_Image):
                 item.setEnabled(True)
                 item.setStyleSheet("")
+            for item in (self.checkBox_RecordAnnotated, self.checkBox_RecordRaw):
+                item.setEnabled(True)
    
+    def init_profile_selector(self):
+        """Add the performance profile selector to the control tab."""
+        self.groupBox_Profile = QtWidgets.QGroupBox("PROFILE", self.tab_control)
+        self.groupBox_Profile.setFont(self.groupBox_7.font())
+        self.groupBox_Profile.setAlignment(QtCore.Qt.AlignCenter)
+        self.groupBox_Profile.setFlat(True)
+        self.groupBox_Profile.setFixedWidth(300)
+        
+        self.comboBox_Profile = QtWidgets.QComboBox(self.groupBox_Profile)
+        font = self.comboBox_Profile.font()
+        font.setBold(False)
+        self.comboBox_Profile.setFont(font)
+        layout = QtWidgets.QVBoxLayout(self.groupBox_Profile)
+        layout.addWidget(self.comboBox_Profile)
+        self.verticalLayout_4.insertWidget(1, self.groupBox_Profile)
+        
+        self.comboBox_Profile.currentTextChanged.connect(self.change_profile)
+    
+    def init_record_options(self):
+        """Add the session recording options to the control tab."""
+        self.groupBox_Record = QtWidgets.QGroupBox("RECORD", self.tab_control)
+        self.groupBox_Record.setFont(self.groupBox_7.font())
+        self.groupBox_Record.setAlignment(QtCore.Qt.AlignCenter)
+        self.groupBox_Record.setFlat(True)
+        self.groupBox_Record.setFixedWidth(300)
+        
+        self.checkBox_RecordAnnotated = QtWidgets.QCheckBox("Annotated", self.groupBox_Record)
+        self.checkBox_RecordRaw = QtWidgets.QCheckBox("Raw", self.groupBox_Record)
+        self.pushButton_Trace = QtWidgets.QPushButton("Save trace", self.groupBox_Record)
+        self.pushButton_Review = QtWidgets.QPushButton("Review", self.groupBox_Record)
+        layout = QtWidgets.QHBoxLayout(self.groupBox_Record)
+        for item in (self.checkBox_RecordAnnotated, self.checkBox_RecordRaw, self.pushButton_Trace, self.pushButton_Review):
+            font = item.font()
+            font.setBold(False)
+            item.setFont(font)
+            layout.addWidget(item)
+        self.verticalLayout_4.insertWidget(2, self.groupBox_Record)
+        
+        self.checkBox_RecordAnnotated.setChecked(co.RECORD_ANNOTATED)
+        self.checkBox_RecordRaw.setChecked(co.RECORD_RAW)
+        self.checkBox_RecordAnnotated.toggled.connect(self.change_record_options)
+        self.checkBox_RecordRaw.toggled.connect(self.change_record_options)
+        self.pushButton_Trace.clicked.connect(self.save_trace)
+        self.pushButton_Review.clicked.connect(self.open_review)
+    
+    def change_record_options(self):
+        """Apply the recording options to the next camera/video session."""
+        self.Main.record_annotated = self.checkBox_RecordAnnotated.isChecked()
+        self.Main.record_raw = self.checkBox_RecordRaw.isChecked()
+    
+    def save_trace(self):
+        """Save the per-frame trace of the last frames for chrome://tracing or Perfetto."""
+        try:
+            path = self.Main.dump_trace()
+            self.MessageBox_signal.emit(f"Trace saved:\n{path}", "info")
+        except Exception as e:
+            self.MessageBox_signal.emit(str(e), "error")
+    
+    def open_review(self):
+        """Scrub through an analyzed video using its saved results index."""
+        try:
+            options = QtWidgets.QFileDialog.Options()
+            video_file, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, 
+                "Chọn file video", 
+                "", 
+                "Video (*.mp4 *.avi *.wmv *.mkv *.mov)", 
+                options=options
+            )
+            if not video_file:
+                return
+            results_index = ResultsIndex.open_for_video(video_file)
+            if results_index is None:
+                self.MessageBox_signal.emit("Video chưa được phân tích! Hãy chạy Video trước.", "warning")
+                return
+            self.review_player = ReviewPlayer(video_file, results_index, self)
+            self.review_player.show()
+        except Exception as e:
+            self.MessageBox_signal.emit(str(e), "error")
+    
+    def init_session_view(self):
+        """Add the running session statistics to the monitor tab."""
+        self.groupBox_Session = QtWidgets.QGroupBox("SESSION", self.tab_monitor)
+        self.groupBox_Session.setFont(self.groupBox_9.font())
+        self.groupBox_Session.setAlignment(QtCore.Qt.AlignCenter)
+        self.groupBox_Session.setFlat(True)
+        
+        self.label_Session = QtWidgets.QLabel("No emotions recorded yet", self.groupBox_Session)
+        font = self.label_Session.font()
+        font.setBold(False)
+        font.setPointSize(10)
+        self.label_Session.setFont(font)
+        self.label_Session.setWordWrap(True)
+        self.label_Session.setAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
+        layout = QtWidgets.QVBoxLayout(self.groupBox_Session)
+        layout.addWidget(self.label_Session)
+        self.verticalLayout_3.addWidget(self.groupBox_Session)
+    
+    def update_profile_list(self):
+        """Fill the profile selector with the profiles from profiles.yaml."""
+        self.comboBox_Profile.blockSignals(True)
+        self.comboBox_Profile.clear()
+        self.comboBox_Profile.addItems(self.Main.profile_manager.names())
+        self.comboBox_Profile.setCurrentText(self.Main.profile_name)
+        self.comboBox_Profile.blockSignals(False)
+    
+    def change_profile(self, name):
+        """Switch to the selected performance profile at runtime."""
+        if name:
+            self.Main.apply_profile(name)
+    
+    def profiles_changed(self):
+        """Reapply the current profile and refresh the selector after profiles.yaml changed."""
+        self.Main.reload_profile()
+        get_updater().call_latest(self.update_profile_list)
+    
     def closeEvent(self, event):
         """Handle application close event."""
         reply = QtWidgets.QMessageBox.question(
@@ -159,11 +313,14 @@ class MainGUI(QtWidgets.QMainWindow):
             cpu_percent = sum(psutil.cpu_percent(percpu=True))/psutil.cpu_count()
             mem_stats = psutil.virtual_memory()
             disk_stats = psutil.disk_usage("/")   
-            get_updater().call_latest(self.progressBar_CPU.setValue, int(cpu_percent)) 
-            get_updater().call_latest(self.progressBar_RAM.setValue, int(mem_stats.percent))
-            get_updater().call_latest(self.progressBar_DISK.setValue, int(disk_stats.percent))
-            get_updater().call_latest(self.ram.setText, f"{round(mem_stats.used/1000000000, 1)}/{round(mem_stats.total/1000000000, 1)}")
-            get_updater().call_latest(self.disk.setText, f"{round(disk_stats.used/1000000000, 1)}/{round(disk_stats.total/1000000000)}")
+            self.Main.view.post(
+                cpu=int(cpu_percent),
+                ram=int(mem_stats.percent),
+                disk=int(disk_stats.percent),
+                ram_text=f"{round(mem_stats.used/1000000000, 1)}/{round(mem_stats.total/1000000000, 1)}",
+                disk_text=f"{round(disk_stats.used/1000000000, 1)}/{round(disk_stats.total/1000000000)}",
+                session_text=format_session_summary(self.Main.session_stats.summary())
+            )
         except Exception as e:
             pass
 
@@ -0,0 +1,243 @@
+# coding=utf-8
+"""
+Haar Cascade parameter calibration over a local folder of labeled frames.
+
+Each image in the folder needs a label file with the same name and a .txt
+extension, containing one face per line as "x y w h" in image pixels
+(an empty file means the frame contains no face).
+
+Usage:
+    python -m src.calibrate --data path/to/labeled_frames --profile-name room1
+"""
+import os
+import csv
+import time
+import argparse
+import itertools
+
+import cv2
+
+from src import config as co
+from src.face_scheduler import iou
+from src.profiles import load_profiles, save_profile
+from src.utils import resize_frame
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+
+def load_labeled_frames(data_dir):
+    """
+    Load images and their face labels from a folder.
+
+    Parameters:
+        data_dir (str): Folder containing images and .txt label files
+
+    Returns:
+        list: List of (file name, image, [(x, y, w, h), ...])
+    """
+    frames = []
+    for name in sorted(os.listdir(data_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+
+        label_path = os.path.join(data_dir, stem + '.txt')
+        if not os.path.exists(label_path):
+            print(f"Skipping {name}: no label file")
+            continue
+
+        image = cv2.imread(os.path.join(data_dir, name))
+        if image is None:
+            print(f"Skipping {name}: cannot read image")
+            continue
+
+        boxes = []
+        with open(label_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                values = line.replace(',', ' ').split()
+                if len(values) >= 4:
+                    boxes.append(tuple(int(float(v)) for v in values[:4]))
+        frames.append((name, image, boxes))
+    return frames
+
+def match_detections(detections, labels, iou_threshold=0.5):
+    """
+    Greedily match detections to labeled faces.
+
+    Returns:
+        tuple: (true positives, false positives)
+    """
+    unmatched = list(labels)
+    true_positives = 0
+    for det in detections:
+        best_index, best_iou = -1, iou_threshold
+        for i, label in enumerate(unmatched):
+            overlap = iou(det, label)
+            if overlap >= best_iou:
+                best_index, best_iou = i, overlap
+        if best_index >= 0:
+            unmatched.pop(best_index)
+            true_positives += 1
+    return true_positives, len(detections) - true_positives
+
+def evaluate(frames, face_cascade, scale_factor, min_neighbors, min_size, resolution, iou_threshold=0.5):
+    """
+    Run face detection with one parameter combination over all labeled frames.
+
+    Parameters:
+        frames (list): Output of load_labeled_frames
+        face_cascade (cv2.CascadeClassifier): Haar Cascade classifier
+        scale_factor (float): Haar Cascade scale factor
+        min_neighbors (int): Haar Cascade minimum neighbors
+        min_size (int): Minimum face size in pixels (at analysis resolution)
+        resolution (tuple): Analysis resolution (max width, max height)
+        iou_threshold (float): Minimum IoU for a detection to count as a face
+
+    Returns:
+        dict: Parameters with recall, false positives per frame and throughput (FPS)
+    """
+    total_faces = 0
+    true_positives = 0
+    false_positives = 0
+    elapsed = 0.0
+
+    for _, image, labels in frames:
+        # Time the same per-frame work as the application: resize, grayscale, detect
+        start = time.perf_counter()
+        frame = resize_frame(image, *resolution)
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = face_cascade.detectMultiScale(
+            gray_frame,
+            scaleFactor=scale_factor,
+            minNeighbors=min_neighbors,
+            minSize=(min_size, min_size)
+        )
+        elapsed += time.perf_counter() - start
+
+        # Map detections back to the labeled image coordinates
+        scale = image.shape[1] / frame.shape[1]
+        detections = [tuple(int(v * scale) for v in face) for face in faces]
+
+        tp, fp = match_detections(detections, labels, iou_threshold)
+        total_faces += len(labels)
+        true_positives += tp
+        false_positives += fp
+
+    return {
+        'scale_factor': scale_factor,
+        'min_neighbors': min_neighbors,
+        'min_size': min_size,
+        'analysis_width': resolution[0],
+        'analysis_height': resolution[1],
+        'recall': true_positives / total_faces if total_faces else 1.0,
+        'false_positives_per_frame': false_positives / len(frames),
+        'fps': len(frames) / elapsed if elapsed > 0 else float('inf'),
+    }
+
+def dominates(a, b):
+    """Check whether result a is at least as good as b in every metric and better in one."""
+    not_worse = (a['recall'] >= b['recall']
+                 and a['false_positives_per_frame'] <= b['false_positives_per_frame']
+                 and a['fps'] >= b['fps'])
+    better = (a['recall'] > b['recall']
+              or a['false_positives_per_frame'] < b['false_positives_per_frame']
+              or a['fps'] > b['fps'])
+    return not_worse and better
+
+def pareto_front(results):
+    """Return the results not dominated by any other result, fastest first."""
+    front = [r for r in results if not any(dominates(other, r) for other in results)]
+    return sorted(front, key=lambda r: r['fps'], reverse=True)
+
+def recommend(front, min_recall):
+    """
+    Pick the fastest Pareto-optimal setting reaching the required recall.
+    Falls back to the setting with the highest recall if none reaches it.
+    """
+    candidates = [r for r in front if r['recall'] >= min_recall]
+    if not candidates:
+        return max(front, key=lambda r: (r['recall'], -r['false_positives_per_frame']))
+    return max(candidates, key=lambda r: (r['fps'], -r['false_positives_per_frame']))
+
+def parse_list(text, cast):
+    """Parse a comma separated list of values."""
+    return [cast(v) for v in text.split(',') if v.strip()]
+
+def parse_resolution(text):
+    """Parse a WIDTHxHEIGHT resolution."""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def print_results(results, title):
+    """Print a result table."""
+    print(f"\n{title}")
+    print(f"{'scale':>6} {'neigh':>6} {'minsz':>6} {'resolution':>11} {'recall':>7} {'FP/frm':>7} {'FPS':>8}")
+    for r in results:
+        resolution = f"{r['analysis_width']}x{r['analysis_height']}"
+        print(f"{r['scale_factor']:>6} {r['min_neighbors']:>6} {r['min_size']:>6} {resolution:>11} "
+              f"{r['recall']:>7.3f} {r['false_positives_per_frame']:>7.3f} {r['fps']:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate Haar Cascade face detection parameters on labeled frames.")
+    parser.add_argument('--data', required=True, help="Folder with images and .txt label files (x y w h per line)")
+    parser.add_argument('--scale-factors', default="1.05,1.1,1.2,1.3")
+    parser.add_argument('--min-neighbors', default="3,5,8,10")
+    parser.add_argument('--min-sizes', default="30,50,70", help="Minimum face sizes in pixels at analysis resolution")
+    parser.add_argument('--resolutions', default="480x360,800x600,1280x960", help="Analysis resolutions WIDTHxHEIGHT")
+    parser.add_argument('--iou', type=float, default=0.5, help="Minimum IoU to match a detection with a labeled face")
+    parser.add_argument('--min-recall', type=float, default=0.9, help="Recall required for the recommended setting")
+    parser.add_argument('--profile-name', default="calibrated", help="Name of the profile to write")
+    parser.add_argument('--base-profile', default=co.DEFAULT_PROFILE, help="Profile providing the remaining settings (FPS, threads)")
+    parser.add_argument('--profiles-file', default=co.PROFILES_FILE)
+    parser.add_argument('--no-save', action='store_true', help="Only report, do not write the profile")
+    args = parser.parse_args()
+
+    frames = load_labeled_frames(args.data)
+    if not frames:
+        parser.error(f"No labeled frames found in {args.data}")
+    print(f"Loaded {len(frames)} labeled frames with {sum(len(f[2]) for f in frames)} faces")
+
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    grid = list(itertools.product(
+        parse_list(args.scale_factors, float),
+        parse_list(args.min_neighbors, int),
+        parse_list(args.min_sizes, int),
+        parse_list(args.resolutions, parse_resolution),
+    ))
+
+    results = []
+    for i, (scale_factor, min_neighbors, min_size, resolution) in enumerate(grid, 1):
+        results.append(evaluate(frames, face_cascade, scale_factor, min_neighbors, min_size, resolution, args.iou))
+        print(f"\rEvaluated {i}/{len(grid)} combinations", end="", flush=True)
+    print()
+
+    # Full report
+    report_path = os.path.join(co.OUTPUT_DIR, f"calibration_{args.profile_name}.csv")
+    with open(report_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+    print(f"Full report written to {report_path}")
+
+    front = pareto_front(results)
+    print_results(front, "Pareto-optimal settings (recall / false positives / FPS):")
+
+    best = recommend(front, args.min_recall)
+    print_results([best], f"Recommended (fastest with recall >= {args.min_recall}):")
+
+    if args.no_save:
+        return
+
+    base = load_profiles(args.profiles_file).get(args.base_profile, {}) if os.path.exists(args.profiles_file) else {}
+    profile = dict(base)
+    profile.update({
+        'scale_factor': best['scale_factor'],
+        'min_neighbors': best['min_neighbors'],
+        'min_size': [best['min_size'], best['min_size']],
+        'analysis_width': best['analysis_width'],
+        'analysis_height': best['analysis_height'],
+    })
+    save_profile(args.profiles_file, args.profile_name, profile)
+    print(f"Profile '{args.profile_name}' written to {args.profiles_file}")
+
+if __name__ == "__main__":
+    main()
@@ -32,4 +32,75 @@ FACE_DETECTION_SCALE_FACTOR = 1.2  # Higher = faster, fewer detections (default:
 FACE_DETECTION_MIN_SIZE = (50, 50)  # Minimum face size in pixels (default: (30, 30))
 
 # Emotion Detection Threshold
-EMOTION_CONFIDENCE_THRESHOLD = 0.5  # Minimum confidence (0.0-1.0) to display emotion (default: 0.5)
\ No newline at end of file
+EMOTION_CONFIDENCE_THRESHOLD = 0.5  # Minimum confidence (0.0-1.0) to display emotion (default: 0.5)
+
+# Performance profiles (YAML file with named profiles, hot reloaded at runtime)
+PROFILES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "profiles.yaml")
+DEFAULT_PROFILE = "balanced"
+PROFILE_RELOAD_INTERVAL = 2  # Seconds between checks for changes to PROFILES_FILE
+
+# Analysis resolution (frames are downscaled to fit before detection)
+ANALYSIS_MAX_WIDTH = 800
+ANALYSIS_MAX_HEIGHT = 600
+
+# Target processing FPS
+TARGET_FPS = 10
+
+# Session recording (written to OUTPUT_DIR on a background thread)
+RECORD_ANNOTATED = False  # Record the annotated stream shown on screen
+RECORD_RAW = False  # Record the raw camera/video stream
+RECORD_FOURCC = "mp4v"  # Codec for cv2.VideoWriter
+RECORD_QUEUE_SIZE = 64  # Frames buffered before new frames are dropped
+
+# Per-frame tracing (dumped as Chrome/Perfetto trace file from the GUI)
+TRACE_ENABLED = True
+TRACE_BUFFER_SIZE = 20000  # Number of spans kept in the ring buffer
+
+# Local inference server (python -m src.server)
+SERVER_HOST = "127.0.0.1"  # Use "0.0.0.0" to accept clients from the LAN
+SERVER_PORT = 8765
+SERVER_MAX_BATCH_SIZE = 32  # Maximum faces per model call
+SERVER_MAX_WAIT_MS = 10  # Maximum time a request waits for others to join its batch
+SERVER_DETECTOR_POOL_SIZE = 4  # Haar Cascade classifiers shared by the request threads
+
+# Motion gate (camera mode: reuse the last results while the scene is static)
+MOTION_GATE_ENABLED = True
+MOTION_GATE_SIZE = (64, 48)  # Size of the downscaled grayscale comparison image
+MOTION_PIXEL_THRESHOLD = 15  # Minimum gray level difference for a pixel to count as changed
+MOTION_THRESHOLD = 0.01  # Fraction of changed pixels above which the frame is analyzed again
+MOTION_MAX_REUSE_SECONDS = 2.0  # Analyze at least this often even without motion
+
+# Face budget (emotion inferences per frame in crowded scenes)
+MAX_FACES_PER_FRAME = 3  # 0 = analyze every face every frame
+FACE_TRACK_IOU_THRESHOLD = 0.3  # Minimum box overlap to keep a face's identity between frames
+FACE_TRACK_MAX_MISSING_FRAMES = 5  # Frames a face is remembered after it disappeared
+
+# Offline emotion model store (python -m src.model_store install)
+EMOTION_MODEL_STORE_DIR = os.path.join(MODEL_WEIGHTS_DIR, "emotion")
+
+# CPU thread budget shared by Qt, OpenCV and TensorFlow (applied at startup)
+THREAD_BUDGET = 0  # Number of cores to use (0 = all physical cores)
+THREAD_AFFINITY = False  # Pin the process to the first THREAD_BUDGET cores
+
+# Session emotion statistics
+SESSION_STATS_WINDOWS = (10, 60)  # Rolling average windows in seconds
+SESSION_STATS_BUCKET_SECONDS = 1.0  # Time resolution of the rolling windows
+SESSION_STATS_MAX_GAP_SECONDS = 2.0  # Longest time credited to an emotion between two observations
+
+# Results index written next to analyzed videos (for the review player)
+RESULTS_INDEX_MAX_FACES = 8  # Maximum faces stored per frame
+
+# Two-tier (cascade) emotion inference (python -m src.fast_classifier distill ...)
+FAST_CLASSIFIER_FILE = os.path.join(MODEL_WEIGHTS_DIR, "fast_emotion.npz")  # Cascade is off while missing
+FAST_CLASSIFIER_DOWNSCALE = 2  # Face crops are averaged in 2x2 blocks (48x48 -> 24x24)
+CASCADE_THRESHOLD = 0.85  # Fast tier confidence needed to skip the full model (0 = always use the full model)
+CASCADE_AUDIT_INTERVAL = 20  # Every n-th fast tier answer is also checked by the full model (0 = never)
+
+# GUI updates from the processing threads
+UI_REFRESH_RATE = 60  # Updates per second when the screen refresh rate is unknown
+
+# Idle back-off (camera mode: nobody in front of the camera)
+IDLE_ENABLED = True
+IDLE_AFTER_SECONDS = 30  # Seconds without faces before switching to idle mode
+IDLE_PROBE_RATE = 1.0  # Face detection probes per second while idle
+IDLE_PROBE_SCALE = 0.5  # Idle probes detect faces on the analysis frame downscaled by this factor
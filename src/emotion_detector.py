@@ -17,6 +17,32 @@ except Exception as e:
     DeepFace = None
 
 from src import config as co
+from src.tracing import get_tracer
+from src.face_scheduler import FaceScheduler
+from src.fast_classifier import FastEmotionClassifier, CascadeStats
+from src.model_store import EMOTION_LABELS, EMOTION_INPUT_SIZE, build_emotion_model, load_emotion_model as load_stored_emotion_model
+
+def preprocess_faces(gray_frame, faces, target_size=EMOTION_INPUT_SIZE):
+    """
+    Crop, resize and normalize all faces of a frame into one batch.
+    
+    Parameters:
+        gray_frame (numpy.ndarray): Grayscale frame computed during face detection
+        faces (list): List of face bounding boxes [(x, y, w, h), ...]
+        target_size (tuple): Model input size (width, height)
+        
+    Returns:
+        numpy.ndarray: Contiguous float32 batch of shape (N, height, width, 1) in [0, 1]
+    """
+    width, height = target_size
+    crops = np.empty((len(faces), height, width), dtype=np.uint8)
+    for i, (x, y, w, h) in enumerate(faces):
+        cv2.resize(gray_frame[y:y+h, x:x+w], (width, height), dst=crops[i], interpolation=cv2.INTER_AREA)
+    
+    # Single vectorized conversion for the whole batch
+    batch = crops.astype(np.float32)
+    batch *= 1.0 / 255.0
+    return batch[..., np.newaxis]
 
 class EmotionDetector:
     """
@@ -25,7 +51,8 @@ class EmotionDetector:
     
     def __init__(self, model_path=None, 
                  min_neighbors=8, scale_factor=1.2, min_face_size=(50, 50),
-                 emotion_confidence_threshold=0.5):
+                 emotion_confidence_threshold=0.5, max_faces_per_frame=0,
+                 cascade_threshold=0.0, cascade_audit_interval=0):
         """
         Initialize the emotion detector.
         
@@ -36,6 +63,11 @@ class EmotionDetector:
             scale_factor (float): Scale factor for Haar Cascade (higher = faster, fewer detections)
             min_face_size (tuple): Minimum face size (width, height) in pixels
             emotion_confidence_threshold (float): Minimum confidence for emotion detection (0.0-1.0)
+            max_faces_per_frame (int): Maximum emotion inferences per frame (0 = analyze every face)
+            cascade_threshold (float): Fast pre-classifier confidence above which the full model is
+                                       skipped (0 = always use the full model)
+            cascade_audit_interval (int): Also run the full model on every n-th fast tier answer
+                                          to measure agreement (0 = never)
         """
         self.model_path = model_path
         self.min_neighbors = min_neighbors
@@ -43,25 +75,43 @@ class EmotionDetector:
         self.min_face_size = min_face_size
         self.emotion_confidence_threshold = emotion_confidence_threshold
         
+        # Tracks faces across frames and limits the emotion inferences per frame
+        self.face_scheduler = FaceScheduler(budget=max_faces_per_frame)
+        
         # Load face cascade classifier
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         
-    def detect_faces(self, frame):
+        # Emotion model used for batched inference (loaded lazily)
+        self.emotion_model = None
+        self._emotion_model_loaded = False
+        
+        # Optional fast pre-classifier (loaded lazily from FAST_CLASSIFIER_FILE)
+        self.cascade_threshold = cascade_threshold
+        self.cascade_audit_interval = cascade_audit_interval
+        self.cascade_stats = CascadeStats()
+        self.fast_classifier = None
+        self._fast_classifier_loaded = False
+        self._audit_counter = 0
+        
+    def detect_faces(self, frame, gray_frame=None, min_face_size=None):
         """
         Detect faces in the frame using Haar Cascade.
         
         Parameters:
             frame (numpy.ndarray): Input frame/image
+            gray_frame (numpy.ndarray): Optional precomputed grayscale version of the frame
+            min_face_size (tuple): Optional minimum face size overriding the detector setting
             
         Returns:
             list: List of face bounding boxes [(x, y, w, h), ...]
         """
-        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if gray_frame is None:
+            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         faces = self.face_cascade.detectMultiScale(
             gray_frame, 
             scaleFactor=self.scale_factor, 
             minNeighbors=self.min_neighbors, 
-            minSize=self.min_face_size
+            minSize=min_face_size or self.min_face_size
         )
         print(f"Face detection: Found {len(faces)} faces (threshold: minNeighbors={self.min_neighbors}, scaleFactor={self.scale_factor})")
         return faces
@@ -103,28 +153,197 @@ class EmotionDetector:
                 }
             }
     
-    def predict(self, frame):
+    def load_emotion_model(self):
+        """
+        Load the emotion model once for direct batched calls.
+        
+        The offline model store (weights/emotion) is tried first, then the .h5 weights
+        file given as model_path, and finally DeepFace (which may download the weights).
+        
+        Returns:
+            Keras model or None if no model is available
+        """
+        if self._emotion_model_loaded:
+            return self.emotion_model
+        self._emotion_model_loaded = True
+        
+        try:
+            self.emotion_model = load_stored_emotion_model()
+            if self.emotion_model is None and self.model_path is not None:
+                self.emotion_model = build_emotion_model(self.model_path)
+                print(f"Emotion model loaded from {self.model_path}")
+        except Exception as e:
+            print(f"Error loading local emotion model: {e}")
+            self.emotion_model = None
+        if self.emotion_model is not None:
+            return self.emotion_model
+        
+        if DeepFace is None:
+            return None
+        
+        try:
+            try:
+                # Newer DeepFace versions wrap the Keras model in a client object
+                client = DeepFace.build_model(task="facial_attribute", model_name="Emotion")
+            except TypeError:
+                client = DeepFace.build_model("Emotion")
+            self.emotion_model = getattr(client, 'model', client)
+            print("Emotion model loaded for batched inference")
+        except Exception as e:
+            print(f"Error loading emotion model: {e}")
+            self.emotion_model = None
+        return self.emotion_model
+    
+    def analyze_emotions_batch(self, batch):
+        """
+        Analyze emotions for a preprocessed batch of faces in one model call.
+        
+        Parameters:
+            batch (numpy.ndarray): Batch from preprocess_faces, shape (N, 48, 48, 1)
+            
+        Returns:
+            list: Emotion analysis results (same format as analyze_emotion), or None
+                  if the emotion model is not available
+        """
+        model = self.load_emotion_model()
+        if model is None:
+            return None
+        if len(batch) == 0:
+            return []
+        
+        try:
+            predictions = self.cascade_predict(model, batch)
+        except Exception as e:
+            print(f"Error in batched emotion analysis: {e}")
+            return None
+        
+        # Percentages like DeepFace.analyze
+        predictions = 100.0 * predictions / predictions.sum(axis=1, keepdims=True)
+        
+        emotion_results = []
+        for scores in predictions:
+            emotion_results.append({
+                'dominant_emotion': EMOTION_LABELS[int(np.argmax(scores))],
+                'emotion': {label: float(score) for label, score in zip(EMOTION_LABELS, scores)}
+            })
+        return emotion_results
+    
+    def load_fast_classifier(self):
+        """
+        Load the fast pre-classifier once.
+        
+        Returns:
+            FastEmotionClassifier or None if it was not distilled yet
+        """
+        if not self._fast_classifier_loaded:
+            self._fast_classifier_loaded = True
+            try:
+                self.fast_classifier = FastEmotionClassifier.load(co.FAST_CLASSIFIER_FILE)
+            except Exception as e:
+                print(f"Error loading fast emotion classifier: {e}")
+                self.fast_classifier = None
+        return self.fast_classifier
+    
+    def cascade_predict(self, model, batch):
+        """
+        Two-tier inference: the fast pre-classifier answers the faces it is confident
+        about, the full model only runs on the others (and on audited faces).
+        
+        Parameters:
+            model: Full emotion model
+            batch (numpy.ndarray): Batch from preprocess_faces
+            
+        Returns:
+            numpy.ndarray: Emotion probabilities of shape (N, len(EMOTION_LABELS))
+        """
+        fast_classifier = self.load_fast_classifier() if self.cascade_threshold > 0 else None
+        if fast_classifier is None:
+            self.cascade_stats.add(fast=0, full=len(batch))
+            return np.asarray(model(batch, training=False))
+        
+        predictions = fast_classifier.predict_proba(batch)
+        confident = predictions.max(axis=1) >= self.cascade_threshold
+        
+        # Periodically send a fast tier answer to the full model as well to track agreement
+        audit = np.zeros(len(batch), dtype=bool)
+        if self.cascade_audit_interval > 0:
+            for i in np.flatnonzero(confident):
+                self._audit_counter += 1
+                if self._audit_counter % self.cascade_audit_interval == 0:
+                    audit[i] = True
+        
+        full = ~confident | audit
+        agreed = 0
+        if full.any():
+            full_predictions = np.asarray(model(batch[full], training=False))
+            fast_labels = predictions[full].argmax(axis=1)
+            predictions[full] = full_predictions
+            agreed = int((fast_labels == full_predictions.argmax(axis=1))[audit[full]].sum())
+        
+        # Audited faces are answered by the full model, so they count as full tier
+        self.cascade_stats.add(fast=int((~full).sum()), full=int(full.sum()),
+                               audited=int(audit.sum()), agreed=agreed)
+        return predictions
+    
+    def cascade_report(self):
+        """
+        Report how often each inference tier was used.
+        
+        Returns:
+            dict: See CascadeStats.report
+        """
+        return self.cascade_stats.report()
+    
+    def predict(self, frame, frame_id=None, scheduler=None):
         """
         Complete emotion detection pipeline: detect faces and analyze emotions.
         
+        With a scheduler (consecutive frames of one stream), faces are tracked and at
+        most scheduler.budget faces are analyzed per frame (see FaceScheduler); the
+        other faces keep their last result with 'stale': True. Otherwise every face is
+        analyzed and no tracking state is used.
+        
         Parameters:
             frame (numpy.ndarray): Input frame/image
+            frame_id (int): Optional frame ID used to label trace spans
+            scheduler (FaceScheduler): Face tracks of the stream the frame belongs to
+                                       (e.g. self.face_scheduler; None = analyze every face)
             
         Returns:
             list: List of dictionaries containing face info and emotion results
         """
         results = []
+        tracer = get_tracer()
         
-        # Detect faces
-        faces = self.detect_faces(frame)
+        # Detect faces (the grayscale frame is reused for preprocessing)
+        with tracer.span("detection", frame_id):
+            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            faces = self.detect_faces(frame, gray_frame=gray_frame)
         
-        for (x, y, w, h) in faces:
-            # Extract face ROI
-            face_roi = frame[y:y+h, x:x+w]
-            
-            # Analyze emotion
-            emotion_result = self.analyze_emotion(face_roi)
+        # Choose the faces analyzed this frame
+        if scheduler is not None:
+            track_ids, selected = scheduler.schedule(faces, frame.shape)
+        else:
+            track_ids, selected = list(range(len(faces))), list(range(len(faces)))
+        selected_faces = [faces[i] for i in selected]
+        
+        # Preprocess the selected faces at once and analyze them in a single model call
+        with tracer.span("preprocess", frame_id, faces=len(selected_faces)):
+            batch = preprocess_faces(gray_frame, selected_faces)
+        with tracer.span("emotion_batch", frame_id, faces=len(selected_faces)):
+            emotion_results = self.analyze_emotions_batch(batch)
+        
+        analyzed = {}
+        for n, i in enumerate(selected):
+            x, y, w, h = faces[i]
+            if emotion_results is not None:
+                emotion_result = emotion_results[n]
+            else:
+                # Fall back to per-face DeepFace analysis
+                with tracer.span("emotion_face", frame_id, face=i):
+                    emotion_result = self.analyze_emotion(frame[y:y+h, x:x+w])
             
+            result = None
             if emotion_result:
                 confidence = max(emotion_result['emotion'].values())
                 
@@ -134,9 +353,9 @@ class EmotionDetector:
                         'bounding_box': (x, y, w, h),
                         'emotion': emotion_result['dominant_emotion'],
                         'emotion_scores': emotion_result['emotion'],
-                        'confidence': confidence
+                        'confidence': confidence,
+                        'track_id': track_ids[i]
                     }
-                    results.append(result)
                     print(f"Emotion detected: {emotion_result['dominant_emotion']} (confidence: {confidence:.2f}) - PASSED threshold")
                 else:
                     print(f"Emotion detected: {emotion_result['dominant_emotion']} (confidence: {confidence:.2f}) - FILTERED (below threshold {self.emotion_confidence_threshold})")
@@ -146,8 +365,17 @@ class EmotionDetector:
                     'bounding_box': (x, y, w, h),
                     'emotion': 'face_detected',
                     'emotion_scores': {'face_detected': 1.0},
-                    'confidence': 1.0
+                    'confidence': 1.0,
+                    'track_id': track_ids[i]
                 }
+            if scheduler is not None:
+                scheduler.update(track_ids[i], result)
+            analyzed[i] = result
+        
+        # Keep the detection order; faces not analyzed this frame show their last result
+        for i, (x, y, w, h) in enumerate(faces):
+            result = analyzed[i] if i in analyzed else scheduler.stale_result(track_ids[i], (x, y, w, h))
+            if result is not None:
                 results.append(result)
         
         return results
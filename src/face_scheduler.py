@@ -0,0 +1,165 @@
+# coding=utf-8
+from src import config as co
+
+def iou(box_a, box_b):
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = inter_w * inter_h
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+class FaceScheduler:
+    """
+    Limit the number of emotion inferences per frame.
+
+    Faces are tracked across frames by bounding box overlap. Every frame the
+    priority face (the designated target, otherwise the largest and most central
+    face) is analyzed, and the remaining budget goes to the other faces in
+    round-robin order (least recently analyzed first, so new faces come first).
+    Faces that are not analyzed keep their last result, marked as stale; new
+    faces that did not fit in the budget get a 'face_detected' placeholder.
+    """
+
+    def __init__(self, budget=co.MAX_FACES_PER_FRAME, iou_threshold=co.FACE_TRACK_IOU_THRESHOLD,
+                 max_missing_frames=co.FACE_TRACK_MAX_MISSING_FRAMES):
+        """
+        Initialize the scheduler.
+
+        Parameters:
+            budget (int): Maximum emotion inferences per frame (0 = analyze every face)
+            iou_threshold (float): Minimum overlap for a face to continue a track
+            max_missing_frames (int): Frames a track is kept after its face disappeared
+        """
+        self.budget = budget
+        self.iou_threshold = iou_threshold
+        self.max_missing_frames = max_missing_frames
+        self.target_track_id = None
+        self.tracks = {}
+        self._next_track_id = 1
+        self._frame_index = 0
+
+    def reset(self):
+        """Forget all tracks."""
+        self.tracks = {}
+        self.target_track_id = None
+
+    def set_target(self, track_id):
+        """
+        Designate the face that is analyzed every frame.
+
+        Parameters:
+            track_id (int): Track ID from the results, or None for automatic priority
+        """
+        self.target_track_id = track_id
+
+    def schedule(self, faces, frame_shape):
+        """
+        Match the detected faces to tracks and choose the faces to analyze this frame.
+
+        Parameters:
+            faces (list): Face bounding boxes [(x, y, w, h), ...]
+            frame_shape (tuple): Shape of the frame (height, width, ...)
+
+        Returns:
+            tuple: (track ID per face, indexes of the faces to analyze)
+        """
+        self._frame_index += 1
+        track_ids = self._match(faces)
+
+        if self.budget <= 0 or len(faces) <= self.budget:
+            return track_ids, list(range(len(faces)))
+
+        # Priority face: designated target, otherwise largest and most central
+        if self.target_track_id in track_ids:
+            priority = track_ids.index(self.target_track_id)
+        else:
+            priority = max(range(len(faces)), key=lambda i: self._priority_score(faces[i], frame_shape))
+
+        # Round-robin over the other faces, least recently analyzed first (new tracks first)
+        others = sorted((i for i in range(len(faces)) if i != priority),
+                        key=lambda i: self.tracks[track_ids[i]]['last_analyzed'])
+        return track_ids, [priority] + others[:self.budget - 1]
+
+    def update(self, track_id, result):
+        """
+        Store the latest result of an analyzed face.
+
+        Parameters:
+            track_id (int): Track ID
+            result (dict): Detection result, or None if it was filtered out
+        """
+        track = self.tracks[track_id]
+        track['result'] = result
+        track['last_analyzed'] = self._frame_index
+
+    def stale_result(self, track_id, bounding_box):
+        """
+        Return the last result of a face that was not analyzed this frame.
+
+        Parameters:
+            track_id (int): Track ID
+            bounding_box (tuple): Current bounding box of the face
+
+        Returns:
+            dict: Last result moved to the current bounding box, a placeholder if the face
+                  was never analyzed, or None if its last result was filtered out
+        """
+        track = self.tracks[track_id]
+        result = track['result']
+        if result is None and track['last_analyzed'] < 0:
+            return {
+                'bounding_box': bounding_box,
+                'emotion': 'face_detected',
+                'emotion_scores': {'face_detected': 1.0},
+                'confidence': 0.0,
+                'track_id': track_id,
+                'stale': True
+            }
+        if result is None:
+            return None
+        result = dict(result)
+        result['bounding_box'] = bounding_box
+        result['stale'] = True
+        return result
+
+    def _priority_score(self, face, frame_shape):
+        """Face area weighted by closeness to the frame center."""
+        x, y, w, h = face
+        height, width = frame_shape[:2]
+        dx = (x + w / 2) / width - 0.5
+        dy = (y + h / 2) / height - 0.5
+        return w * h * (1.0 - (dx * dx + dy * dy))
+
+    def _match(self, faces):
+        """Greedily assign each face to the best overlapping track, creating new tracks as needed."""
+        track_ids = [None] * len(faces)
+        unmatched = set(self.tracks.keys())
+        pairs = sorted(((iou(face, self.tracks[track_id]['box']), i, track_id)
+                        for i, face in enumerate(faces) for track_id in self.tracks), reverse=True)
+        for overlap, i, track_id in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if track_ids[i] is None and track_id in unmatched:
+                track_ids[i] = track_id
+                unmatched.discard(track_id)
+
+        for i, face in enumerate(faces):
+            if track_ids[i] is None:
+                track_ids[i] = self._next_track_id
+                self._next_track_id += 1
+                self.tracks[track_ids[i]] = {'result': None, 'last_analyzed': -1}
+            track = self.tracks[track_ids[i]]
+            track['box'] = tuple(int(v) for v in face)
+            track['missing'] = 0
+
+        # Drop tracks whose face disappeared for too long
+        for track_id in unmatched:
+            self.tracks[track_id]['missing'] += 1
+            if self.tracks[track_id]['missing'] > self.max_missing_frames:
+                del self.tracks[track_id]
+                if self.target_track_id == track_id:
+                    self.target_track_id = None
+        return track_ids
@@ -0,0 +1,290 @@
+# coding=utf-8
+"""
+Fast emotion pre-classifier for two-tier (cascade) inference.
+
+A softmax regression on downscaled face crops, distilled from the full emotion
+network. EmotionDetector runs it first and only sends the faces it is not
+confident about to the full model.
+
+Usage (distill from the full model on your own session videos/images):
+    python -m src.fast_classifier distill videos/ session1.mp4 photo.jpg
+"""
+import os
+import argparse
+import threading
+
+import cv2
+import numpy as np
+
+from src import config as co
+from src.model_store import EMOTION_LABELS
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.wmv', '.mkv', '.mov')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+
+class FastEmotionClassifier:
+    """
+    Softmax regression on face crops downscaled by `downscale` (48x48 -> 24x24 by default).
+
+    Takes the same preprocessed batches as the full model (see preprocess_faces).
+    """
+
+    def __init__(self, downscale=co.FAST_CLASSIFIER_DOWNSCALE):
+        """
+        Parameters:
+            downscale (int): Block size averaged into one input feature
+        """
+        self.downscale = downscale
+        self.weights = None
+        self.bias = None
+        self.mean = None
+        self.std = None
+
+    def features(self, batch):
+        """
+        Downscale and normalize a preprocessed batch.
+
+        Parameters:
+            batch (numpy.ndarray): Batch of shape (N, height, width, 1) in [0, 1]
+
+        Returns:
+            numpy.ndarray: Feature matrix of shape (N, features)
+        """
+        n, height, width = batch.shape[:3]
+        k = self.downscale
+        crops = batch[:, :height - height % k, :width - width % k, 0]
+        crops = crops.reshape(n, height // k, k, width // k, k).mean(axis=(2, 4))
+        features = crops.reshape(n, -1)
+        # Per-face contrast normalization (lighting changes between rooms)
+        features = features - features.mean(axis=1, keepdims=True)
+        features /= features.std(axis=1, keepdims=True) + 1e-6
+        if self.mean is not None:
+            features = (features - self.mean) / self.std
+        return features.astype(np.float32)
+
+    def predict_proba(self, batch):
+        """
+        Emotion probabilities for a preprocessed batch.
+
+        Returns:
+            numpy.ndarray: Probabilities of shape (N, len(EMOTION_LABELS)) in EMOTION_LABELS order
+        """
+        return _softmax(self.features(batch) @ self.weights + self.bias)
+
+    def fit(self, batch, targets, epochs=300, learning_rate=0.5, l2=1e-3):
+        """
+        Train on a batch labelled by the full model (soft targets).
+
+        Parameters:
+            batch (numpy.ndarray): Preprocessed faces, shape (N, height, width, 1)
+            targets (numpy.ndarray): Full model probabilities, shape (N, len(EMOTION_LABELS))
+            epochs (int): Full-batch gradient descent steps
+            learning_rate (float): Step size
+            l2 (float): Weight decay
+
+        Returns:
+            FastEmotionClassifier: self
+        """
+        self.mean = None
+        features = self.features(batch)
+        self.mean = features.mean(axis=0)
+        self.std = features.std(axis=0) + 1e-6
+        features = (features - self.mean) / self.std
+
+        targets = np.asarray(targets, dtype=np.float32)
+        targets = targets / targets.sum(axis=1, keepdims=True)
+        n, dims = features.shape
+        self.weights = np.zeros((dims, targets.shape[1]), dtype=np.float32)
+        self.bias = np.log(targets.mean(axis=0) + 1e-6).astype(np.float32)
+
+        velocity_w = np.zeros_like(self.weights)
+        velocity_b = np.zeros_like(self.bias)
+        for epoch in range(epochs):
+            error = (_softmax(features @ self.weights + self.bias) - targets) / n
+            velocity_w = 0.9 * velocity_w - learning_rate * (features.T @ error + l2 * self.weights)
+            velocity_b = 0.9 * velocity_b - learning_rate * error.sum(axis=0)
+            self.weights += velocity_w
+            self.bias += velocity_b
+        return self
+
+    def save(self, path=co.FAST_CLASSIFIER_FILE):
+        """Save the classifier as a .npz file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(path, weights=self.weights, bias=self.bias, mean=self.mean, std=self.std,
+                 downscale=self.downscale, labels=np.array(EMOTION_LABELS))
+        print(f"Fast emotion classifier saved: {path}")
+        return path
+
+    @classmethod
+    def load(cls, path=co.FAST_CLASSIFIER_FILE):
+        """
+        Load a saved classifier.
+
+        Returns:
+            FastEmotionClassifier, or None if the file does not exist or does not match EMOTION_LABELS
+        """
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        if list(data['labels']) != EMOTION_LABELS:
+            print(f"Fast emotion classifier {path} was trained for other labels, ignored")
+            return None
+        classifier = cls(int(data['downscale']))
+        classifier.weights = data['weights']
+        classifier.bias = data['bias']
+        classifier.mean = data['mean']
+        classifier.std = data['std']
+        print(f"Fast emotion classifier loaded from {path}")
+        return classifier
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+class CascadeStats:
+    """
+    Counters of the two-tier inference: faces answered by each tier (audited
+    faces are answered by the full model and counted there) and the agreement
+    of the fast tier with the full model on audited faces.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.fast = 0
+            self.full = 0
+            self.audited = 0
+            self.agreed = 0
+
+    def add(self, fast, full, audited=0, agreed=0):
+        with self._lock:
+            self.fast += fast
+            self.full += full
+            self.audited += audited
+            self.agreed += agreed
+
+    def report(self):
+        """
+        Returns:
+            dict: Faces per tier, share of the fast tier and its audited agreement with the full model
+        """
+        with self._lock:
+            total = self.fast + self.full
+            return {
+                'faces': total,
+                'fast_tier': self.fast,
+                'full_tier': self.full,
+                'fast_ratio': self.fast / total if total else 0.0,
+                'audited': self.audited,
+                'fast_agreement': self.agreed / self.audited if self.audited else None,
+            }
+
+def format_cascade_report(report):
+    """Format a cascade report for display."""
+    text = (f"Cascade: {report['faces']} faces, {report['fast_ratio']:.0%} fast tier "
+            f"({report['fast_tier']} fast / {report['full_tier']} full)")
+    if report['fast_agreement'] is not None:
+        text += f", fast tier agrees with full model on {report['fast_agreement']:.0%} of {report['audited']} audited faces"
+    return text
+
+def _iter_frames(path, frame_step):
+    """Yield frames from an image or (every frame_step-th frame of) a video."""
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        frame = cv2.imread(path)
+        if frame is not None:
+            yield frame
+        return
+    camera = cv2.VideoCapture(path)
+    frame_number = 0
+    while True:
+        ret, frame = camera.read()
+        if not ret:
+            break
+        if frame_number % frame_step == 0:
+            yield frame
+        frame_number += 1
+    camera.release()
+
+def _collect_files(sources):
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                if name.lower().endswith(VIDEO_EXTENSIONS + IMAGE_EXTENSIONS):
+                    files.append(os.path.join(source, name))
+        else:
+            files.append(source)
+    return files
+
+def distill(sources, output=co.FAST_CLASSIFIER_FILE, frame_step=5, threshold=co.CASCADE_THRESHOLD, holdout=0.2):
+    """
+    Train the fast classifier on faces labelled by the full emotion model.
+
+    Parameters:
+        sources (list): Videos, images or directories containing them
+        output (str): Output .npz file
+        frame_step (int): Use every frame_step-th video frame
+        threshold (float): Cascade threshold used for the evaluation report
+        holdout (float): Fraction of faces kept for evaluation
+
+    Returns:
+        FastEmotionClassifier: Trained classifier
+    """
+    from src.emotion_detector import preprocess_faces
+    from src.streaming import create_detector
+    from src.utils import resize_frame
+
+    detector = create_detector()
+    model = detector.load_emotion_model()
+    if model is None:
+        raise RuntimeError("The full emotion model is required for distillation")
+
+    batches = []
+    for path in _collect_files(sources):
+        faces_before = sum(len(batch) for batch in batches)
+        for frame in _iter_frames(path, frame_step):
+            frame = resize_frame(frame, co.ANALYSIS_MAX_WIDTH, co.ANALYSIS_MAX_HEIGHT)
+            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            faces = detector.detect_faces(frame, gray_frame=gray_frame)
+            if len(faces):
+                batches.append(preprocess_faces(gray_frame, faces))
+        print(f"{path}: {sum(len(batch) for batch in batches) - faces_before} faces")
+    if not batches:
+        raise RuntimeError("No faces found in the given sources")
+
+    batch = np.concatenate(batches)
+    targets = np.concatenate([np.asarray(model(batch[i:i + 256], training=False)) for i in range(0, len(batch), 256)])
+
+    order = np.random.default_rng(0).permutation(len(batch))
+    n_test = int(len(batch) * holdout) if len(batch) >= 10 else 0
+    test, train = order[:n_test], order[n_test:]
+
+    classifier = FastEmotionClassifier().fit(batch[train], targets[train])
+    if n_test:
+        probabilities = classifier.predict_proba(batch[test])
+        agree = probabilities.argmax(axis=1) == targets[test].argmax(axis=1)
+        confident = probabilities.max(axis=1) >= threshold
+        print(f"Held-out faces: {n_test}, fast/full agreement {agree.mean():.1%}")
+        if confident.any():
+            print(f"Threshold {threshold}: {confident.mean():.1%} of faces answered by the fast tier, "
+                  f"agreement {agree[confident].mean():.1%}")
+    classifier.save(output)
+    return classifier
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the fast emotion pre-classifier from the full model.")
+    parser.add_argument('command', choices=['distill'])
+    parser.add_argument('sources', nargs='+', help="Videos, images or directories")
+    parser.add_argument('--output', default=co.FAST_CLASSIFIER_FILE, help="Output .npz file")
+    parser.add_argument('--frame-step', type=int, default=5, help="Use every n-th video frame")
+    parser.add_argument('--threshold', type=float, default=co.CASCADE_THRESHOLD,
+                        help="Cascade confidence threshold for the evaluation report")
+    args = parser.parse_args()
+    distill(args.sources, args.output, args.frame_step, args.threshold)
+
+if __name__ == "__main__":
+    main()
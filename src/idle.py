@@ -0,0 +1,74 @@
+# coding=utf-8
+import time
+
+from src import config as co
+
+class IdleMonitor:
+    """
+    Decide when the camera loop may back off because nobody is in front of the camera.
+
+    After `idle_after` seconds without a face the monitor turns idle and only
+    allows a face detection probe `probe_rate` times per second; the first face
+    seen switches it back to full rate.
+
+    monitor = IdleMonitor()
+    if not monitor.idle or monitor.probe_due():
+        faces = detector.detect_faces(frame)
+        monitor.update(len(faces) > 0)
+    """
+
+    def __init__(self, idle_after=co.IDLE_AFTER_SECONDS, probe_rate=co.IDLE_PROBE_RATE):
+        """
+        Parameters:
+            idle_after (float): Seconds without faces before switching to idle mode
+            probe_rate (float): Face detection probes per second while idle
+        """
+        self.idle_after = idle_after
+        self.probe_rate = probe_rate
+        self.idle = False
+        self.idle_periods = 0
+        self._last_face = time.monotonic()
+        self._last_probe = 0.0
+
+    def reset(self):
+        """Leave idle mode and restart the no-face timer."""
+        self.idle = False
+        self._last_face = time.monotonic()
+
+    def probe_due(self):
+        """
+        Check whether an idle probe should run now (always True while active).
+
+        Returns:
+            bool: True if face detection should run on this frame
+        """
+        if not self.idle:
+            return True
+        now = time.monotonic()
+        if now - self._last_probe >= 1.0 / self.probe_rate:
+            self._last_probe = now
+            return True
+        return False
+
+    def update(self, faces_present):
+        """
+        Record the outcome of a face detection.
+
+        Parameters:
+            faces_present (bool): Whether any face was found
+
+        Returns:
+            bool: True if the monitor is idle after this update
+        """
+        now = time.monotonic()
+        if faces_present:
+            if self.idle:
+                print("Face detected: leaving idle mode")
+            self.idle = False
+            self._last_face = now
+        elif not self.idle and now - self._last_face >= self.idle_after:
+            self.idle = True
+            self.idle_periods += 1
+            self._last_probe = now
+            print(f"No face for {self.idle_after:g}s: idle mode ({self.probe_rate:g} Hz detection)")
+        return self.idle
@@ -0,0 +1,200 @@
+# coding=utf-8
+"""
+Offline store for the emotion model weights.
+
+The weights are stored as flat NumPy arrays (one .npy file per weight tensor)
+with a manifest of SHA-256 checksums. Loading memory-maps the arrays into the
+locally built network, so no network access or DeepFace download is needed.
+
+Usage (once, on a machine with the weights or network access):
+    python -m src.model_store install [--weights weights/facial_expression_model_weights.h5]
+    python -m src.model_store verify
+"""
+import os
+import json
+import shutil
+import hashlib
+import argparse
+
+import numpy as np
+
+from src import config as co
+
+# Output order of the DeepFace emotion model
+EMOTION_LABELS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+
+# Input size (width, height) expected by the DeepFace emotion model
+EMOTION_INPUT_SIZE = (48, 48)
+
+MANIFEST_FILE = "manifest.json"
+STORE_FORMAT = 1
+
+def _keras():
+    try:
+        # DeepFace uses tf_keras with TensorFlow >= 2.16
+        import tf_keras as keras
+    except ImportError:
+        from tensorflow import keras
+    return keras
+
+def build_emotion_model(weights_path=None):
+    """
+    Build the DeepFace emotion network locally.
+
+    Parameters:
+        weights_path (str): Optional .h5 weights file (e.g. facial_expression_model_weights.h5)
+
+    Returns:
+        Keras model
+    """
+    keras = _keras()
+    layers = keras.layers
+    width, height = EMOTION_INPUT_SIZE
+
+    model = keras.models.Sequential([
+        layers.Conv2D(64, (5, 5), activation="relu", input_shape=(height, width, 1)),
+        layers.MaxPooling2D(pool_size=(5, 5), strides=(2, 2)),
+        layers.Conv2D(64, (3, 3), activation="relu"),
+        layers.Conv2D(64, (3, 3), activation="relu"),
+        layers.AveragePooling2D(pool_size=(3, 3), strides=(2, 2)),
+        layers.Conv2D(128, (3, 3), activation="relu"),
+        layers.Conv2D(128, (3, 3), activation="relu"),
+        layers.AveragePooling2D(pool_size=(3, 3), strides=(2, 2)),
+        layers.Flatten(),
+        layers.Dense(1024, activation="relu"),
+        layers.Dropout(0.2),
+        layers.Dense(1024, activation="relu"),
+        layers.Dropout(0.2),
+        layers.Dense(len(EMOTION_LABELS), activation="softmax"),
+    ])
+    if weights_path is not None:
+        model.load_weights(weights_path)
+    return model
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _read_manifest(store_dir):
+    path = os.path.join(store_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != STORE_FORMAT:
+        print(f"Unsupported model store format in {store_dir}")
+        return None
+    return manifest
+
+def install(weights_path=None, store_dir=co.EMOTION_MODEL_STORE_DIR):
+    """
+    Install the emotion model weights into the store.
+
+    Parameters:
+        weights_path (str): .h5 weights file; if None, FACIAL_EXPRESSION_MODEL is used when it
+                            exists, otherwise the model is fetched through DeepFace
+        store_dir (str): Store directory
+
+    Returns:
+        str: Store directory
+    """
+    if weights_path is None and os.path.exists(co.FACIAL_EXPRESSION_MODEL):
+        weights_path = co.FACIAL_EXPRESSION_MODEL
+
+    if weights_path is not None:
+        print(f"Loading weights from {weights_path}")
+        model = build_emotion_model(weights_path)
+    else:
+        from src.emotion_detector import EmotionDetector
+        print("Fetching the emotion model through DeepFace")
+        model = EmotionDetector().load_emotion_model()
+        if model is None:
+            raise RuntimeError("Cannot load the emotion model through DeepFace")
+
+    # Write into a temporary directory and swap it in, so a failed install keeps the old store
+    tmp_dir = store_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    files = []
+    for i, weight in enumerate(model.get_weights()):
+        name = f"weight_{i:02d}.npy"
+        path = os.path.join(tmp_dir, name)
+        np.save(path, np.ascontiguousarray(weight, dtype=np.float32))
+        files.append({'name': name, 'shape': list(weight.shape), 'sha256': _sha256(path)})
+
+    manifest = {
+        'format': STORE_FORMAT,
+        'model': "emotion",
+        'labels': EMOTION_LABELS,
+        'input_size': list(EMOTION_INPUT_SIZE),
+        'files': files,
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+    print(f"Emotion model installed in {store_dir} ({len(files)} arrays)")
+    return store_dir
+
+def verify(store_dir=co.EMOTION_MODEL_STORE_DIR):
+    """
+    Check the stored weights against the manifest checksums.
+
+    Returns:
+        bool: True if the store is complete and unmodified
+    """
+    manifest = _read_manifest(store_dir)
+    if manifest is None:
+        return False
+    for entry in manifest['files']:
+        path = os.path.join(store_dir, entry['name'])
+        if not os.path.exists(path) or _sha256(path) != entry['sha256']:
+            print(f"Model store: checksum mismatch for {entry['name']}")
+            return False
+    return True
+
+def load_emotion_model(store_dir=co.EMOTION_MODEL_STORE_DIR, check=True):
+    """
+    Load the emotion model from the store without network access.
+
+    Parameters:
+        store_dir (str): Store directory
+        check (bool): Verify the checksums before loading
+
+    Returns:
+        Keras model, or None if the store is missing or invalid
+    """
+    manifest = _read_manifest(store_dir)
+    if manifest is None:
+        return None
+    if check and not verify(store_dir):
+        return None
+
+    weights = [np.load(os.path.join(store_dir, entry['name']), mmap_mode='r') for entry in manifest['files']]
+    model = build_emotion_model()
+    model.set_weights(weights)
+    print(f"Emotion model loaded from {store_dir}")
+    return model
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the offline emotion model store.")
+    parser.add_argument('command', choices=['install', 'verify'])
+    parser.add_argument('--weights', default=None, help="Emotion model .h5 weights file to install")
+    parser.add_argument('--store', default=co.EMOTION_MODEL_STORE_DIR, help="Store directory")
+    args = parser.parse_args()
+
+    if args.command == 'install':
+        install(args.weights, args.store)
+        ok = verify(args.store)
+    else:
+        ok = verify(args.store)
+    print("Model store OK" if ok else "Model store missing or corrupted")
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
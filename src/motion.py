@@ -0,0 +1,75 @@
+# coding=utf-8
+import time
+
+import cv2
+import numpy as np
+
+from src import config as co
+
+class MotionGate:
+    """
+    Cheap frame-difference gate deciding whether a frame needs to be analyzed again.
+
+    Each frame is reduced to a tiny grayscale image and compared with the last
+    analyzed frame; when too few pixels changed, the previous results can be reused.
+
+    gate = MotionGate()
+    if gate.check(frame):
+        results = detector.predict(frame)
+    """
+
+    def __init__(self, threshold=co.MOTION_THRESHOLD, pixel_threshold=co.MOTION_PIXEL_THRESHOLD,
+                 size=co.MOTION_GATE_SIZE, max_reuse_seconds=co.MOTION_MAX_REUSE_SECONDS):
+        """
+        Initialize the motion gate.
+
+        Parameters:
+            threshold (float): Fraction of changed pixels (0.0-1.0) above which a frame counts as moving
+            pixel_threshold (int): Minimum gray level difference (0-255) for a pixel to count as changed
+            size (tuple): Size (width, height) of the downscaled comparison image
+            max_reuse_seconds (float): Force a new analysis after this many seconds without motion
+        """
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.size = size
+        self.max_reuse_seconds = max_reuse_seconds
+        self.motion_fraction = 0.0
+        self.frames_checked = 0
+        self.frames_skipped = 0
+        self._reference = None
+        self._reference_time = 0.0
+
+    def reset(self):
+        """Force the next frame to be analyzed."""
+        self._reference = None
+
+    def check(self, frame):
+        """
+        Check whether the frame changed enough since the last analyzed frame.
+
+        Parameters:
+            frame (numpy.ndarray): BGR frame (any size)
+
+        Returns:
+            bool: True if the frame should be analyzed, False if the last results can be reused
+        """
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (3, 3), 0)
+        now = time.monotonic()
+        self.frames_checked += 1
+
+        if self._reference is None or now - self._reference_time >= self.max_reuse_seconds:
+            self.motion_fraction = 1.0
+        else:
+            diff = cv2.absdiff(small, self._reference)
+            self.motion_fraction = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+
+        if self.motion_fraction < self.threshold:
+            # Keep the old reference so slow changes still add up
+            self.frames_skipped += 1
+            return False
+
+        self._reference = small
+        self._reference_time = now
+        return True
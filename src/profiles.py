@@ -0,0 +1,156 @@
+import os
+import yaml
+
+from src import config as co
+from src import Timer
+
+# Values used for any key a profile does not define
+DEFAULT_SETTINGS = {
+    'scale_factor': co.FACE_DETECTION_SCALE_FACTOR,
+    'min_neighbors': co.FACE_DETECTION_MIN_NEIGHBORS,
+    'min_size': co.FACE_DETECTION_MIN_SIZE,
+    'emotion_confidence_threshold': co.EMOTION_CONFIDENCE_THRESHOLD,
+    'max_faces_per_frame': co.MAX_FACES_PER_FRAME,
+    'cascade_threshold': co.CASCADE_THRESHOLD,
+    'analysis_width': co.ANALYSIS_MAX_WIDTH,
+    'analysis_height': co.ANALYSIS_MAX_HEIGHT,
+    'target_fps': co.TARGET_FPS,
+    'opencv_threads': 0,
+    'tf_intra_op_threads': 0,
+    'tf_inter_op_threads': 0,
+}
+
+def load_profiles(path):
+    """
+    Load named performance profiles from a YAML file.
+
+    Parameters:
+        path (str): Path to the profiles YAML file
+
+    Returns:
+        dict: Profile name -> settings dict (missing keys filled from DEFAULT_SETTINGS)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+
+    profiles = {}
+    for name, values in data.items():
+        settings = dict(DEFAULT_SETTINGS)
+        for key, value in (values or {}).items():
+            if key not in DEFAULT_SETTINGS:
+                print(f"Profile '{name}': unknown key '{key}' ignored")
+                continue
+            settings[key] = value
+        settings['min_size'] = tuple(settings['min_size'])
+        profiles[str(name)] = settings
+    return profiles
+
+def save_profile(path, name, settings):
+    """
+    Add or replace a profile in the YAML file, keeping its leading comment block.
+
+    Parameters:
+        path (str): Path to the profiles YAML file
+        name (str): Profile name
+        settings (dict): Profile settings
+    """
+    header = []
+    data = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        for line in lines:
+            if line.strip() and not line.lstrip().startswith('#'):
+                break
+            header.append(line)
+        data = yaml.safe_load(''.join(lines)) or {}
+
+    settings = dict(settings)
+    settings['min_size'] = list(settings.get('min_size', DEFAULT_SETTINGS['min_size']))
+    data[name] = settings
+
+    body = '\n'.join(yaml.safe_dump({key: value}, sort_keys=False, default_flow_style=None) for key, value in data.items())
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(''.join(header) + body)
+
+class ProfileManager:
+    """
+    Keeps the named profiles of a YAML file and reloads them when the file changes.
+    """
+
+    def __init__(self, path=co.PROFILES_FILE, on_change=None):
+        """
+        Initialize the profile manager.
+
+        Parameters:
+            path (str): Path to the profiles YAML file
+            on_change (callable): Called without arguments after the profiles were reloaded
+        """
+        self.path = path
+        self.on_change = on_change
+        self.profiles = {co.DEFAULT_PROFILE: dict(DEFAULT_SETTINGS)}
+        self._mtime = None
+        self._watcher = None
+        self.reload_if_changed()
+
+    def names(self):
+        """Return the available profile names."""
+        return list(self.profiles.keys())
+
+    def get(self, name):
+        """
+        Get the settings of a profile.
+
+        Parameters:
+            name (str): Profile name
+
+        Returns:
+            dict: Profile settings, or the default settings if the profile does not exist
+        """
+        if name not in self.profiles:
+            print(f"Profile '{name}' not found, using defaults")
+            return dict(DEFAULT_SETTINGS)
+        return self.profiles[name]
+
+    def reload_if_changed(self):
+        """
+        Reload the profiles if the YAML file was modified.
+
+        Returns:
+            bool: True if the profiles were reloaded
+        """
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        first_load = self._mtime is None
+        self._mtime = mtime
+
+        try:
+            profiles = load_profiles(self.path)
+        except Exception as e:
+            # Keep the previous profiles while the file is being edited
+            print(f"Error loading profiles: {e}")
+            return False
+        if not profiles:
+            return False
+
+        self.profiles = profiles
+        print(f"Profiles loaded: {', '.join(self.names())}")
+        if self.on_change is not None and not first_load:
+            self.on_change()
+        return True
+
+    def watch(self, interval=co.PROFILE_RELOAD_INTERVAL):
+        """Start checking the YAML file for changes in the background."""
+        if self._watcher is None:
+            self._watcher = Timer.Timer(function=self.reload_if_changed, name="profile_watcher", forever=True, interval=interval, type="repeat")
+            self._watcher.start()
+
+    def stop(self):
+        """Stop watching the YAML file."""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
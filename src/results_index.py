@@ -0,0 +1,213 @@
+# coding=utf-8
+import os
+import json
+
+import numpy as np
+
+from src import config as co
+from src.model_store import EMOTION_LABELS
+
+INDEX_VERSION = 1
+INDEX_EXTENSION = ".emoidx"
+
+# Emotion codes stored in the index (EMOTION_LABELS order, then special values)
+INDEX_LABELS = EMOTION_LABELS + ['face_detected']
+NO_EMOTION = 255
+
+FACE_DTYPE = np.dtype([
+    ('box', np.int16, 4),
+    ('emotion', np.uint8),
+    ('confidence', np.float32),
+])
+
+def record_dtype(max_faces):
+    """Fixed-size record of one analyzed frame."""
+    return np.dtype([
+        ('frame', np.int32),
+        ('main_emotion', np.uint8),
+        ('n_faces', np.uint8),
+        ('faces', FACE_DTYPE, max_faces),
+    ])
+
+def index_path_for(video_path):
+    """Return the results index file next to a video."""
+    return os.path.splitext(video_path)[0] + INDEX_EXTENSION
+
+def _emotion_code(emotion):
+    try:
+        return INDEX_LABELS.index(emotion)
+    except ValueError:
+        return NO_EMOTION
+
+def _main_face(results):
+    """
+    Face whose emotion defines the frame's main emotion.
+
+    The detection order changes between frames, so the longest-tracked face
+    (lowest track ID) is used, or the largest face for untracked results.
+    """
+    def key(result):
+        x, y, w, h = result['bounding_box']
+        track_id = result.get('track_id')
+        return (track_id if track_id is not None else float('inf'), -w * h)
+    return min(results, key=key)
+
+class ResultsIndexWriter:
+    """
+    Append the results of analyzed video frames to a compact binary index.
+
+    The index consists of three files next to the video:
+        <video>.emoidx                    fixed-size records (memory-mappable)
+        <video>.emoidx.json               metadata
+        <video>.emoidx.transitions.npy    frame numbers where the main emotion changes
+    """
+
+    def __init__(self, video_path, fps, frame_size, max_faces=co.RESULTS_INDEX_MAX_FACES):
+        """
+        Parameters:
+            video_path (str): Analyzed video file
+            fps (float): Frame rate of the video
+            frame_size (tuple): Size (width, height) of the video frames
+            max_faces (int): Maximum faces stored per frame
+        """
+        self.path = index_path_for(video_path)
+        if not os.access(os.path.dirname(os.path.abspath(self.path)), os.W_OK):
+            # Read-only video folder: keep the index in the output directory
+            self.path = os.path.join(co.OUTPUT_DIR, os.path.basename(self.path))
+
+        self.meta = {
+            'version': INDEX_VERSION,
+            'video': os.path.abspath(video_path),
+            'fps': fps,
+            'frame_size': list(frame_size),
+            'max_faces': max_faces,
+            'labels': INDEX_LABELS,
+            'records': 0,
+        }
+        self._dtype = record_dtype(max_faces)
+        self._record = np.zeros(1, dtype=self._dtype)
+        self._file = open(self.path + ".tmp", 'wb')
+
+    def add(self, frame_number, results, scale=1.0):
+        """
+        Add the results of one analyzed frame.
+
+        Parameters:
+            frame_number (int): 0-based frame number in the video
+            results (list): Output of EmotionDetector.predict
+            scale (float): Factor from the analyzed frame to the video frame size
+        """
+        if self._file is None:
+            return
+        record = self._record[0]
+        record['faces'] = 0
+        faces = results[:self.meta['max_faces']]
+        record['frame'] = frame_number
+        record['n_faces'] = len(faces)
+        record['main_emotion'] = _emotion_code(_main_face(results)['emotion']) if results else NO_EMOTION
+        for i, result in enumerate(faces):
+            record['faces'][i]['box'] = [int(v * scale) for v in result['bounding_box']]
+            record['faces'][i]['emotion'] = _emotion_code(result['emotion'])
+            record['faces'][i]['confidence'] = result['confidence']
+        self._file.write(self._record.tobytes())
+        self.meta['records'] += 1
+
+    def close(self):
+        """Finish the index: write the metadata and the emotion transition points."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.replace(self.path + ".tmp", self.path)
+
+        records = np.memmap(self.path, dtype=self._dtype, mode='r') if self.meta['records'] else np.zeros(0, self._dtype)
+        main = records['main_emotion']
+        changes = np.flatnonzero(main[1:] != main[:-1]) + 1
+        np.save(self.path + ".transitions.npy", np.asarray(records['frame'][changes], dtype=np.int32))
+        del records
+
+        with open(self.path + ".json", 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+        print(f"Results index saved: {self.path} ({self.meta['records']} frames, {len(changes)} emotion changes)")
+
+class ResultsIndex:
+    """
+    Memory-mapped results index of an analyzed video for instant seeking.
+
+    index = ResultsIndex.open_for_video("session.mp4")
+    results = index.results_at(frame_number)
+    next_frame = index.next_transition(frame_number)
+    """
+
+    def __init__(self, path):
+        """
+        Parameters:
+            path (str): Index file (<video>.emoidx)
+        """
+        with open(path + ".json", 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported results index version in {path}")
+
+        self.path = path
+        self.labels = self.meta['labels']
+        dtype = record_dtype(self.meta['max_faces'])
+        self.records = np.memmap(path, dtype=dtype, mode='r') if self.meta['records'] else np.zeros(0, dtype)
+        self.frames = self.records['frame']
+        self.transitions = np.load(path + ".transitions.npy", mmap_mode='r')
+
+    @classmethod
+    def open_for_video(cls, video_path):
+        """
+        Open the index of a video, or return None if the video was not analyzed yet.
+
+        Parameters:
+            video_path (str): Video file
+        """
+        for path in (index_path_for(video_path), os.path.join(co.OUTPUT_DIR, os.path.basename(index_path_for(video_path)))):
+            if os.path.exists(path) and os.path.exists(path + ".json"):
+                return cls(path)
+        return None
+
+    @property
+    def fps(self):
+        return self.meta['fps']
+
+    @property
+    def frame_size(self):
+        return tuple(self.meta['frame_size'])
+
+    def results_at(self, frame_number):
+        """
+        Return the results of the last analyzed frame at or before frame_number.
+
+        Parameters:
+            frame_number (int): 0-based frame number in the video
+
+        Returns:
+            list: Results in the EmotionDetector.predict format (bounding boxes in video frame coordinates)
+        """
+        position = int(np.searchsorted(self.frames, frame_number, side='right')) - 1
+        if position < 0:
+            return []
+
+        record = self.records[position]
+        results = []
+        for face in record['faces'][:record['n_faces']]:
+            emotion = self.labels[face['emotion']] if face['emotion'] < len(self.labels) else 'unknown'
+            results.append({
+                'bounding_box': tuple(int(v) for v in face['box']),
+                'emotion': emotion,
+                'confidence': float(face['confidence']),
+            })
+        return results
+
+    def next_transition(self, frame_number):
+        """Return the next frame after frame_number where the main emotion changes, or None."""
+        position = int(np.searchsorted(self.transitions, frame_number, side='right'))
+        return int(self.transitions[position]) if position < len(self.transitions) else None
+
+    def previous_transition(self, frame_number):
+        """Return the last frame before frame_number where the main emotion changes, or None."""
+        position = int(np.searchsorted(self.transitions, frame_number, side='left')) - 1
+        return int(self.transitions[position]) if position >= 0 else None
@@ -0,0 +1,96 @@
+# coding=utf-8
+import cv2
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from src import config as co
+from src.utils import resize_frame
+
+class ReviewPlayer(QtWidgets.QDialog):
+    """
+    Scrub through an analyzed video using its results index.
+
+    The emotion results are read from the memory-mapped index, so seeking never
+    re-runs detection; only the requested video frame is decoded.
+    """
+
+    def __init__(self, video_path, results_index, parent=None):
+        """
+        Parameters:
+            video_path (str): Analyzed video file
+            results_index (ResultsIndex): Results index of the video
+            parent (QWidget): Parent window
+        """
+        super(ReviewPlayer, self).__init__(parent)
+        self.index = results_index
+        self.camera = cv2.VideoCapture(video_path)
+        self.frame_count = max(1, int(self.camera.get(cv2.CAP_PROP_FRAME_COUNT)))
+        self.current_frame = 0
+
+        self.setWindowTitle(f"Review - {video_path}")
+        self.resize(co.ANALYSIS_MAX_WIDTH + 40, co.ANALYSIS_MAX_HEIGHT + 120)
+
+        self.label_Image = QtWidgets.QLabel(self)
+        self.label_Image.setAlignment(QtCore.Qt.AlignCenter)
+        self.label_Image.setMinimumSize(320, 240)
+        self.label_Result = QtWidgets.QLabel(self)
+
+        self.slider = QtWidgets.QSlider(QtCore.Qt.Horizontal, self)
+        self.slider.setRange(0, self.frame_count - 1)
+        self.pushButton_Previous = QtWidgets.QPushButton("<< Prev change", self)
+        self.pushButton_Next = QtWidgets.QPushButton("Next change >>", self)
+
+        controls = QtWidgets.QHBoxLayout()
+        controls.addWidget(self.pushButton_Previous)
+        controls.addWidget(self.slider)
+        controls.addWidget(self.pushButton_Next)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.label_Image, 1)
+        layout.addWidget(self.label_Result)
+        layout.addLayout(controls)
+
+        self.slider.valueChanged.connect(self.show_frame)
+        self.pushButton_Previous.clicked.connect(self.previous_change)
+        self.pushButton_Next.clicked.connect(self.next_change)
+        self.show_frame(0)
+
+    def show_frame(self, frame_number):
+        """Decode one video frame and draw the indexed results on it."""
+        self.current_frame = frame_number
+        self.camera.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        ret, frame = self.camera.read()
+        if not ret:
+            return
+
+        results = self.index.results_at(frame_number)
+        image = resize_frame(frame, co.ANALYSIS_MAX_WIDTH, co.ANALYSIS_MAX_HEIGHT)
+        scale = image.shape[1] / frame.shape[1]
+        for result in results:
+            x, y, w, h = (int(v * scale) for v in result['bounding_box'])
+            cv2.rectangle(image, (x, y), (x + w, y + h), (255, 0, 0), 2)
+            cv2.putText(image, f"{result['emotion']}: {result['confidence']:.2f}", (x, y - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+
+        height, width, channel = image.shape
+        img_qt = QtGui.QImage(image.data, width, height, channel * width, QtGui.QImage.Format_RGB888).rgbSwapped()
+        self.label_Image.setPixmap(QtGui.QPixmap.fromImage(img_qt))
+
+        seconds = frame_number / self.index.fps if self.index.fps else 0.0
+        emotions = ", ".join(result['emotion'] for result in results) or "no face"
+        self.label_Result.setText(f"Frame {frame_number} ({seconds:.1f}s): {emotions}")
+
+    def seek(self, frame_number):
+        """Move the slider (and the displayed frame) to frame_number."""
+        if frame_number is not None:
+            self.slider.setValue(frame_number)
+
+    def previous_change(self):
+        """Jump to the previous change of the main emotion."""
+        self.seek(self.index.previous_transition(self.current_frame))
+
+    def next_change(self):
+        """Jump to the next change of the main emotion."""
+        self.seek(self.index.next_transition(self.current_frame))
+
+    def closeEvent(self, event):
+        self.camera.release()
+        event.accept()
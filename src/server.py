@@ -0,0 +1,339 @@
+# coding=utf-8
+"""
+Local HTTP inference service with dynamic micro-batching.
+
+Capture clients (e.g. tablets on the LAN) send JPEG/PNG encoded frames or face
+crops; concurrent requests are gathered into one batch (up to --max-batch faces
+or --max-wait-ms after the first request) before the emotion model is called.
+
+Usage:
+    python -m src.server --host 0.0.0.0 --port 8765
+
+Endpoints:
+    POST /predict   body: full frame  -> {"faces": [{"bounding_box", "emotion", "emotion_scores", "confidence"}, ...]}
+    POST /classify  body: face crop   -> {"faces": [{"emotion", "emotion_scores", "confidence"}]}
+    GET  /health    -> {"status": "ok", "requests", "batches", "mean_batch_size", "cascade"}
+"""
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from src import config as co
+from src.emotion_detector import preprocess_faces
+from src.streaming import create_detector
+from src.thread_budget import apply_thread_budget
+from src.utils import resize_frame
+
+MAX_REQUEST_SIZE = 16 * 1024 * 1024  # bytes
+
+class MicroBatcher:
+    """
+    Gather face batches from concurrent requests into one emotion model call.
+    """
+
+    def __init__(self, detector, max_batch_size=co.SERVER_MAX_BATCH_SIZE, max_wait=co.SERVER_MAX_WAIT_MS / 1000.0):
+        """
+        Initialize the batcher and start its worker thread.
+
+        Parameters:
+            detector (EmotionDetector): Detector providing analyze_emotions_batch
+            max_batch_size (int): Maximum number of faces per model call
+            max_wait (float): Maximum time (seconds) the first request of a batch waits for others
+        """
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self.faces = 0
+
+        self._queue = queue.Queue()
+        self._held = None  # Request that did not fit in the previous batch
+        self._thread = threading.Thread(target=self._run, name="micro_batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, batch):
+        """
+        Queue a preprocessed face batch for analysis.
+
+        Parameters:
+            batch (numpy.ndarray): Output of preprocess_faces, shape (N, 48, 48, 1)
+
+        Returns:
+            concurrent.futures.Future: Resolves to a list of emotion results (or None if
+                                       the emotion model is not available)
+        """
+        future = Future()
+        if len(batch) == 0:
+            future.set_result([])
+            return future
+        self._queue.put((batch, future))
+        return future
+
+    def stats(self):
+        """Return batching statistics."""
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.faces / self.batches if self.batches else 0.0,
+            'cascade': self.detector.cascade_report(),
+        }
+
+    def _collect(self):
+        """
+        Wait for a request, then gather more until the batch is full or the deadline passes.
+
+        A request that would push the batch past max_batch_size is held back for the next batch.
+        """
+        if self._held is not None:
+            pending, self._held = [self._held], None
+        else:
+            pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if size + len(item[0]) > self.max_batch_size:
+                self._held = item
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            try:
+                batch = np.concatenate([item[0] for item in pending])
+                # A single request larger than max_batch_size is split into several model calls
+                emotion_results = []
+                for start in range(0, len(batch), self.max_batch_size):
+                    chunk_results = self.detector.analyze_emotions_batch(batch[start:start + self.max_batch_size])
+                    self.batches += 1
+                    if chunk_results is None:
+                        emotion_results = None
+                        break
+                    emotion_results.extend(chunk_results)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.requests += len(pending)
+            self.faces += len(batch)
+
+            start = 0
+            for item, future in pending:
+                if emotion_results is None:
+                    future.set_result(None)
+                else:
+                    future.set_result(emotion_results[start:start + len(item)])
+                start += len(item)
+
+class FaceDetectorPool:
+    """
+    Pool of Haar Cascade classifiers shared by the request threads.
+
+    ThreadingHTTPServer starts a new thread per request and CascadeClassifier is
+    not thread-safe, so each request checks out a classifier from the pool instead
+    of loading the cascade XML again.
+    """
+
+    def __init__(self, detector, size=co.SERVER_DETECTOR_POOL_SIZE):
+        """
+        Parameters:
+            detector (EmotionDetector): Detector providing the detection parameters
+            size (int): Maximum number of classifiers (concurrent detections)
+        """
+        self.detector = detector
+        self.size = max(1, size)
+        self.created = 0
+        self._pool = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self.created < self.size:
+                self.created += 1
+                return cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        return self._pool.get()
+
+    def detect_faces(self, gray_frame):
+        """
+        Detect faces with a pooled classifier.
+
+        Parameters:
+            gray_frame (numpy.ndarray): Grayscale frame
+
+        Returns:
+            list: Face bounding boxes [(x, y, w, h), ...]
+        """
+        classifier = self._checkout()
+        try:
+            return classifier.detectMultiScale(
+                gray_frame,
+                scaleFactor=self.detector.scale_factor,
+                minNeighbors=self.detector.min_neighbors,
+                minSize=self.detector.min_face_size
+            )
+        finally:
+            self._pool.put(classifier)
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """HTTP handler for the inference endpoints (set up by create_server)."""
+
+    server_version = "AutismEmotionAI/1.0"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, dict(status="ok", **self.server.batcher.stats()))
+        else:
+            self._send_json(404, {'error': "not found"})
+
+    def do_POST(self):
+        if self.path not in ("/predict", "/classify"):
+            self._send_json(404, {'error': "not found"})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        if length <= 0 or length > MAX_REQUEST_SIZE:
+            self._send_json(413 if length > 0 else 400, {'error': "invalid request size"})
+            return
+
+        image = cv2.imdecode(np.frombuffer(self.rfile.read(length), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            self._send_json(400, {'error': "cannot decode image"})
+            return
+
+        try:
+            if self.path == "/predict":
+                faces = self._predict(image)
+            else:
+                faces = self._classify(image)
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+
+        if faces is None:
+            self._send_json(503, {'error': "emotion model not available"})
+        else:
+            self._send_json(200, {'faces': faces})
+
+    def _predict(self, image):
+        """Detect faces in a frame and analyze them through the batcher."""
+        frame = resize_frame(image, *self.server.analysis_size)
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = self.server.face_detectors.detect_faces(gray_frame)
+
+        emotion_results = self.server.batcher.submit(preprocess_faces(gray_frame, faces)).result()
+        if emotion_results is None:
+            return None
+
+        # Bounding boxes in the coordinates of the submitted image
+        scale = image.shape[1] / frame.shape[1]
+        output = []
+        for (x, y, w, h), emotion_result in zip(faces, emotion_results):
+            face = self._format(emotion_result)
+            if face is not None:
+                face['bounding_box'] = [int(v * scale) for v in (x, y, w, h)]
+                output.append(face)
+        return output
+
+    def _classify(self, image):
+        """Analyze a single face crop through the batcher."""
+        gray_face = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        height, width = gray_face.shape
+        emotion_results = self.server.batcher.submit(preprocess_faces(gray_face, [(0, 0, width, height)])).result()
+        if emotion_results is None:
+            return None
+        face = self._format(emotion_results[0])
+        return [face] if face is not None else []
+
+    def _format(self, emotion_result):
+        confidence = max(emotion_result['emotion'].values())
+        if confidence < self.server.emotion_confidence_threshold:
+            return None
+        return {
+            'emotion': emotion_result['dominant_emotion'],
+            'emotion_scores': emotion_result['emotion'],
+            'confidence': confidence,
+        }
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def create_server(host=co.SERVER_HOST, port=co.SERVER_PORT, max_batch_size=co.SERVER_MAX_BATCH_SIZE,
+                  max_wait_ms=co.SERVER_MAX_WAIT_MS,
+                  analysis_size=(co.ANALYSIS_MAX_WIDTH, co.ANALYSIS_MAX_HEIGHT)):
+    """
+    Create the inference server (call serve_forever() to run it).
+
+    Parameters:
+        host (str): Address to listen on ("0.0.0.0" to accept LAN clients)
+        port (int): Port to listen on
+        max_batch_size (int): Maximum number of faces per model call
+        max_wait_ms (float): Maximum time a request waits for others to join its batch
+        analysis_size (tuple): Maximum frame size (width, height) used for face detection
+
+    Returns:
+        ThreadingHTTPServer: The server
+    """
+    detector = create_detector()
+    detector.load_emotion_model()
+
+    server = ThreadingHTTPServer((host, port), InferenceHandler)
+    server.daemon_threads = True
+    server.batcher = MicroBatcher(detector, max_batch_size=max_batch_size, max_wait=max_wait_ms / 1000.0)
+    server.analysis_size = analysis_size
+    server.emotion_confidence_threshold = detector.emotion_confidence_threshold
+
+    server.face_detectors = FaceDetectorPool(detector)
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local emotion inference service with dynamic micro-batching.")
+    parser.add_argument('--host', default=co.SERVER_HOST)
+    parser.add_argument('--port', type=int, default=co.SERVER_PORT)
+    parser.add_argument('--max-batch', type=int, default=co.SERVER_MAX_BATCH_SIZE, help="Maximum faces per model call")
+    parser.add_argument('--max-wait-ms', type=float, default=co.SERVER_MAX_WAIT_MS, help="Maximum wait for a batch to fill")
+    parser.add_argument('--threads', type=int, default=co.THREAD_BUDGET, help="CPU thread budget (0 = all physical cores)")
+    args = parser.parse_args()
+
+    apply_thread_budget(args.threads)
+    server = create_server(args.host, args.port, args.max_batch, args.max_wait_ms)
+    print(f"Inference server listening on http://{args.host}:{args.port} "
+          f"(max batch: {args.max_batch}, max wait: {args.max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+# coding=utf-8
+import json
+import time
+import threading
+
+import numpy as np
+
+from src import config as co
+from src.model_store import EMOTION_LABELS
+
+_LABEL_INDEX = {label: i for i, label in enumerate(EMOTION_LABELS)}
+
+class RollingWindow:
+    """
+    Rolling average of emotion scores over the last `window` seconds.
+
+    Samples are summed into fixed time buckets stored in a ring buffer; the
+    running total is updated by adding new samples and subtracting expired
+    buckets, so each update costs O(1) regardless of the session length.
+    """
+
+    def __init__(self, window, bucket=co.SESSION_STATS_BUCKET_SECONDS):
+        """
+        Parameters:
+            window (float): Window length in seconds
+            bucket (float): Bucket length in seconds (time resolution of the window)
+        """
+        self.window = window
+        self.bucket = bucket
+        self.size = max(1, int(round(window / bucket)))
+        self.sums = np.zeros((self.size, len(EMOTION_LABELS)))
+        self.counts = np.zeros(self.size, dtype=np.int64)
+        self.total = np.zeros(len(EMOTION_LABELS))
+        self.total_count = 0
+        self._current = None
+
+    def _advance(self, timestamp):
+        """Expire the buckets that fell out of the window."""
+        index = int(timestamp // self.bucket)
+        if self._current is None:
+            self._current = index
+            return
+        steps = min(index - self._current, self.size)
+        for step in range(1, steps + 1):
+            slot = (self._current + step) % self.size
+            self.total -= self.sums[slot]
+            self.total_count -= self.counts[slot]
+            self.sums[slot] = 0.0
+            self.counts[slot] = 0
+        if index // self.size != self._current // self.size:
+            # Once per window: recompute the total to drop accumulated rounding errors
+            self.total = self.sums.sum(axis=0)
+            self.total_count = int(self.counts.sum())
+        self._current = max(self._current, index)
+
+    def add(self, timestamp, scores):
+        """
+        Add a score vector.
+
+        Parameters:
+            timestamp (float): Time of the sample in seconds
+            scores (numpy.ndarray): Emotion probabilities in EMOTION_LABELS order
+        """
+        self._advance(timestamp)
+        slot = self._current % self.size
+        self.sums[slot] += scores
+        self.counts[slot] += 1
+        self.total += scores
+        self.total_count += 1
+
+    def mean(self, timestamp=None):
+        """
+        Average scores over the window.
+
+        Parameters:
+            timestamp (float): Current time (expires old buckets first); None = time of the last sample
+
+        Returns:
+            numpy.ndarray: Mean probabilities, or None if the window is empty
+        """
+        if timestamp is not None:
+            self._advance(timestamp)
+        if self.total_count <= 0:
+            return None
+        return np.maximum(self.total, 0.0) / self.total_count
+
+class FaceStats:
+    """Streaming statistics of one tracked face (child)."""
+
+    def __init__(self, windows=co.SESSION_STATS_WINDOWS):
+        self.seconds = np.zeros(len(EMOTION_LABELS))
+        self.transitions = np.zeros((len(EMOTION_LABELS), len(EMOTION_LABELS)), dtype=np.int64)
+        self.windows = {window: RollingWindow(window) for window in windows}
+        self.samples = 0
+        self.emotion = None
+        self.first_seen = None
+        self.last_seen = None
+
+    def update(self, timestamp, emotion_index, scores, max_gap=co.SESSION_STATS_MAX_GAP_SECONDS):
+        """Add one observation of the face."""
+        if self.first_seen is None:
+            self.first_seen = timestamp
+        elif self.emotion is not None:
+            # The previous emotion lasted until now (gaps while the face was away are not counted)
+            self.seconds[self.emotion] += min(max(0.0, timestamp - self.last_seen), max_gap)
+            if emotion_index != self.emotion:
+                self.transitions[self.emotion, emotion_index] += 1
+
+        self.emotion = emotion_index
+        self.last_seen = timestamp
+        self.samples += 1
+        for window in self.windows.values():
+            window.add(timestamp, scores)
+
+    def snapshot(self, timestamp=None):
+        """Copy the raw statistics (cheap; formatted later by _format_face without any lock)."""
+        return {
+            'emotion': self.emotion,
+            'samples': self.samples,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'seconds': self.seconds.copy(),
+            'transitions': self.transitions.copy(),
+            'rolling': {length: window.mean(timestamp) for length, window in self.windows.items()},
+        }
+
+    def summary(self, timestamp=None):
+        """Return the statistics as a JSON-serializable dict."""
+        return _format_face(self.snapshot(timestamp))
+
+def _format_transitions(transitions):
+    return {
+        f"{EMOTION_LABELS[i]}->{EMOTION_LABELS[j]}": int(transitions[i, j])
+        for i, j in zip(*np.nonzero(transitions))
+    }
+
+def _format_face(snapshot):
+    """Format a FaceStats snapshot as a JSON-serializable dict."""
+    rolling = {}
+    for length, mean in snapshot['rolling'].items():
+        rolling[f"{length:g}s"] = None if mean is None else {
+            label: float(value) for label, value in zip(EMOTION_LABELS, mean)
+        }
+    return {
+        'current_emotion': EMOTION_LABELS[snapshot['emotion']] if snapshot['emotion'] is not None else None,
+        'samples': snapshot['samples'],
+        'first_seen': snapshot['first_seen'],
+        'last_seen': snapshot['last_seen'],
+        'seconds_per_emotion': {label: float(value) for label, value in zip(EMOTION_LABELS, snapshot['seconds'])},
+        'transition_count': int(snapshot['transitions'].sum()),
+        'transitions': _format_transitions(snapshot['transitions']),
+        'rolling_average': rolling,
+    }
+
+class SessionStats:
+    """
+    Incrementally updated emotion statistics of a session, per tracked face.
+
+    Fed with the results of EmotionDetector.predict for every processed frame;
+    the cost per frame is constant, so multi-hour sessions stay cheap. Tracks
+    not seen for longer than the largest window are folded into one aggregate
+    of departed faces, so the number of tracked faces stays bounded.
+
+    stats = SessionStats()
+    stats.update(results, timestamp)
+    stats.summary()
+    stats.export("session.json")
+    """
+
+    def __init__(self, windows=co.SESSION_STATS_WINDOWS):
+        """
+        Parameters:
+            windows (tuple): Rolling average window lengths in seconds
+        """
+        self.windows = windows
+        self.retire_after = max(windows)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a new session."""
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self.faces = {}
+        self.retired_faces = 0
+        self.retired_samples = 0
+        self.retired_seconds = np.zeros(len(EMOTION_LABELS))
+        self.retired_transitions = np.zeros((len(EMOTION_LABELS), len(EMOTION_LABELS)), dtype=np.int64)
+        self._last_retire = None
+        self.frames = 0
+        self.started = time.time()
+        self.last_timestamp = None
+        self.exported = False
+
+    def update(self, results, timestamp=None):
+        """
+        Add the results of one processed frame.
+
+        Parameters:
+            results (list): Output of EmotionDetector.predict
+            timestamp (float): Session time in seconds (default: time.monotonic())
+        """
+        with self._lock:
+            self._update(results, timestamp)
+
+    def _update(self, results, timestamp):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self.frames += 1
+        self.last_timestamp = timestamp
+
+        for result in results:
+            emotion_index = _LABEL_INDEX.get(result['emotion'])
+            if emotion_index is None:
+                continue
+
+            scores = np.fromiter((result['emotion_scores'].get(label, 0.0) for label in EMOTION_LABELS),
+                                 dtype=np.float64, count=len(EMOTION_LABELS))
+            total = scores.sum()
+            if total > 0:
+                scores /= total
+
+            track_id = result.get('track_id', 0)
+            face = self.faces.get(track_id)
+            if face is None:
+                face = self.faces[track_id] = FaceStats(self.windows)
+            face.update(timestamp, emotion_index, scores)
+
+        if self._last_retire is None or timestamp - self._last_retire >= co.SESSION_STATS_BUCKET_SECONDS:
+            self._last_retire = timestamp
+            self._retire(timestamp)
+
+    def _retire(self, timestamp):
+        """Fold the faces gone for longer than the largest window into the departed aggregate."""
+        for track_id in [track_id for track_id, face in self.faces.items()
+                         if timestamp - face.last_seen > self.retire_after]:
+            face = self.faces.pop(track_id)
+            self.retired_faces += 1
+            self.retired_samples += face.samples
+            self.retired_seconds += face.seconds
+            self.retired_transitions += face.transitions
+
+    def summary(self):
+        """
+        Return the session statistics.
+
+        Returns:
+            dict: Session info and per-face statistics keyed by track ID
+        """
+        # Copy the raw state under the lock, format it outside so update() is not blocked
+        with self._lock:
+            started = self.started
+            frames = self.frames
+            faces = [(track_id, face.snapshot(self.last_timestamp)) for track_id, face in self.faces.items()]
+            retired_faces = self.retired_faces
+            retired_samples = self.retired_samples
+            retired_seconds = self.retired_seconds.copy()
+            retired_transitions = self.retired_transitions.copy()
+
+        return {
+            'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started)),
+            'frames': frames,
+            'faces': {str(track_id): _format_face(snapshot) for track_id, snapshot in faces},
+            'departed_faces': {
+                'count': retired_faces,
+                'samples': retired_samples,
+                'seconds_per_emotion': {label: float(value) for label, value in zip(EMOTION_LABELS, retired_seconds)},
+                'transition_count': int(retired_transitions.sum()),
+                'transitions': _format_transitions(retired_transitions),
+            },
+        }
+
+    def export(self, path, extra=None):
+        """
+        Write the session statistics to a JSON file.
+
+        Parameters:
+            path (str): Output file
+            extra (dict): Additional top-level entries (e.g. the cascade inference report)
+
+        Returns:
+            str: Path of the written file
+        """
+        summary = self.summary()
+        summary.update(extra or {})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        self.exported = True
+        print(f"Session statistics saved: {path}")
+        return path
@@ -0,0 +1,206 @@
+# coding=utf-8
+"""
+Asyncio streaming API around EmotionDetector (no GUI required).
+
+    async for frame_result in stream(0, target_fps=10):
+        print(frame_result.frame_number, frame_result.results)
+
+Capture and inference run in executors so the event loop stays responsive,
+frames are only analyzed as fast as the consumer takes results (backpressure)
+and breaking out of the loop or cancelling the task releases the camera/video.
+Several sources can be consumed from one event loop with stream_many().
+"""
+import os
+import time
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from src import config as co
+from src.emotion_detector import EmotionDetector
+from src.face_scheduler import FaceScheduler
+from src.utils import resize_frame
+
+# Serializes predict() calls when one detector is shared by several streams
+_detector_locks = weakref.WeakKeyDictionary()
+_detector_locks_guard = threading.Lock()
+
+class FrameResult:
+    """Emotion detection results for one analyzed frame of a source."""
+
+    __slots__ = ('source', 'frame_number', 'timestamp', 'frame', 'results')
+
+    def __init__(self, source, frame_number, timestamp, frame, results):
+        """
+        Parameters:
+            source: Camera index or video path the frame came from
+            frame_number (int): Frame number in the source (1-based)
+            timestamp (float): Position in the video (seconds) or capture time (time.time()) for cameras
+            frame (numpy.ndarray): Analyzed (resized) frame; bounding boxes refer to this frame
+            results (list): Output of EmotionDetector.predict
+        """
+        self.source = source
+        self.frame_number = frame_number
+        self.timestamp = timestamp
+        self.frame = frame
+        self.results = results
+
+    def __repr__(self):
+        return f"FrameResult(source={self.source!r}, frame_number={self.frame_number}, faces={len(self.results)})"
+
+def create_detector():
+    """Create an EmotionDetector with the thresholds and local model weights from config."""
+    model_path = co.FACIAL_EXPRESSION_MODEL if os.path.exists(co.FACIAL_EXPRESSION_MODEL) else None
+    return EmotionDetector(
+        model_path=model_path,
+        min_neighbors=co.FACE_DETECTION_MIN_NEIGHBORS,
+        scale_factor=co.FACE_DETECTION_SCALE_FACTOR,
+        min_face_size=co.FACE_DETECTION_MIN_SIZE,
+        emotion_confidence_threshold=co.EMOTION_CONFIDENCE_THRESHOLD,
+        max_faces_per_frame=co.MAX_FACES_PER_FRAME,
+        cascade_threshold=co.CASCADE_THRESHOLD,
+        cascade_audit_interval=co.CASCADE_AUDIT_INTERVAL
+    )
+
+def _detector_lock(detector):
+    with _detector_locks_guard:
+        lock = _detector_locks.get(detector)
+        if lock is None:
+            lock = _detector_locks[detector] = threading.Lock()
+        return lock
+
+def _analyze(detector, scheduler, frame, analysis_size):
+    frame = resize_frame(frame, *analysis_size)
+    with _detector_lock(detector):
+        results = detector.predict(frame, scheduler=scheduler)
+    return frame, results
+
+async def _capture(loop, camera, capture_executor, queue, frame_skip, drop_frames, is_camera):
+    """Read frames into the queue until the source ends; None marks the end."""
+    try:
+        frame_number = 0
+        while True:
+            ret, frame = await loop.run_in_executor(capture_executor, camera.read)
+            if not ret:
+                break
+            frame_number += 1
+            if frame_number % frame_skip != 0:
+                continue
+
+            timestamp = time.time() if is_camera else camera.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if drop_frames and queue.full():
+                # Live source: keep the newest frames instead of stalling the camera
+                queue.get_nowait()
+            await queue.put((frame_number, timestamp, frame))
+        await queue.put(None)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        await queue.put(e)
+
+async def stream(source, detector=None, target_fps=None,
+                 analysis_size=(co.ANALYSIS_MAX_WIDTH, co.ANALYSIS_MAX_HEIGHT),
+                 max_pending=2, drop_frames=None, executor=None):
+    """
+    Analyze a camera or video file and yield a FrameResult per analyzed frame.
+
+    Parameters:
+        source (int or str): Camera index or video file path
+        detector (EmotionDetector): Detector to use; a new one is created if None.
+                                    It can be shared between streams (each stream tracks its own faces)
+        target_fps (float): Analyze at most this many frames per second of source time
+                            (None = every frame)
+        analysis_size (tuple): Maximum frame size (width, height) used for analysis
+        max_pending (int): Maximum number of captured frames waiting for inference
+        drop_frames (bool): Drop the oldest waiting frame instead of pausing capture when
+                            the consumer is slower than the source (default: True for cameras)
+        executor (concurrent.futures.Executor): Executor for inference (None = loop default)
+
+    Yields:
+        FrameResult: Results for each analyzed frame
+    """
+    loop = asyncio.get_running_loop()
+    is_camera = isinstance(source, int)
+    if drop_frames is None:
+        drop_frames = is_camera
+    if detector is None:
+        detector = await loop.run_in_executor(executor, create_detector)
+    # Face tracks belong to this source; only the detector/model is shared
+    scheduler = FaceScheduler(budget=detector.face_scheduler.budget)
+
+    # VideoCapture is not thread-safe: all capture calls go through one thread
+    capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"capture_{source}")
+    camera = await loop.run_in_executor(capture_executor, cv2.VideoCapture, source)
+    capture_task = None
+    try:
+        if not camera.isOpened():
+            raise IOError(f"Cannot open camera/video: {source}")
+
+        source_fps = camera.get(cv2.CAP_PROP_FPS) or 30
+        frame_skip = max(1, int(source_fps // target_fps)) if target_fps else 1
+
+        queue = asyncio.Queue(maxsize=max(1, max_pending))
+        capture_task = asyncio.ensure_future(_capture(loop, camera, capture_executor, queue, frame_skip, drop_frames, is_camera))
+
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            frame_number, timestamp, frame = item
+            frame, results = await loop.run_in_executor(executor, _analyze, detector, scheduler, frame, analysis_size)
+            yield FrameResult(source, frame_number, timestamp, frame, results)
+    finally:
+        if capture_task is not None:
+            capture_task.cancel()
+            try:
+                await capture_task
+            except asyncio.CancelledError:
+                pass
+        await loop.run_in_executor(capture_executor, camera.release)
+        capture_executor.shutdown(wait=False)
+
+async def stream_many(sources, **kwargs):
+    """
+    Consume several sources concurrently and yield their FrameResults as they arrive.
+
+    Parameters:
+        sources (list): Camera indexes and/or video file paths
+        **kwargs: Passed to stream() for every source
+
+    Yields:
+        FrameResult: Results from any of the sources (check FrameResult.source)
+    """
+    done = object()
+    queue = asyncio.Queue(maxsize=max(1, len(sources)))
+
+    async def pump(source):
+        try:
+            async for frame_result in stream(source, **kwargs):
+                await queue.put(frame_result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(done)
+
+    tasks = [asyncio.ensure_future(pump(source)) for source in sources]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
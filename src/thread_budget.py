@@ -0,0 +1,110 @@
+# coding=utf-8
+import os
+import sys
+
+import cv2
+import psutil
+
+from src import config as co
+
+_layout = None
+
+def plan_thread_budget(total=co.THREAD_BUDGET, opencv_threads=0, tf_intra_op_threads=0, tf_inter_op_threads=0):
+    """
+    Split one CPU thread budget between the Qt GUI, OpenCV and TensorFlow.
+
+    One core is kept for the Qt main thread; of the rest, about a third goes to
+    OpenCV (Haar detection) and the remainder to TensorFlow intra-op parallelism.
+    Overrides that do not fit in the budget are reduced (with a warning).
+
+    Parameters:
+        total (int): Number of cores to use (0 = all physical cores)
+        opencv_threads (int): Override for OpenCV threads (0 = from budget)
+        tf_intra_op_threads (int): Override for TensorFlow intra-op threads (0 = from budget)
+        tf_inter_op_threads (int): Override for TensorFlow inter-op threads (0 = from budget)
+
+    Returns:
+        dict: Thread layout
+    """
+    cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    total = min(total, os.cpu_count() or total) if total > 0 else cores
+
+    workers = max(1, total - 1)  # One core for the Qt main thread
+    opencv = opencv_threads or max(1, workers // 3)
+    tf_intra = tf_intra_op_threads or max(1, workers - opencv)
+    tf_inter = tf_inter_op_threads or 1
+
+    # Overrides must fit in the budget (at least one thread each)
+    if opencv + tf_intra > max(2, workers):
+        clamped_opencv = max(1, min(opencv, workers - 1))
+        clamped_tf_intra = max(1, min(tf_intra, workers - clamped_opencv))
+        print(f"Thread overrides (OpenCV {opencv}, TensorFlow {tf_intra}) exceed the budget of {workers} "
+              f"worker threads: using OpenCV {clamped_opencv}, TensorFlow {clamped_tf_intra}")
+        opencv, tf_intra = clamped_opencv, clamped_tf_intra
+    return {
+        'cores': total,
+        'gui': 1,
+        'opencv': opencv,
+        'tf_intra_op': tf_intra,
+        'tf_inter_op': tf_inter,
+    }
+
+def apply_thread_budget(total=co.THREAD_BUDGET, affinity=co.THREAD_AFFINITY, **overrides):
+    """
+    Configure OpenCV and TensorFlow thread pools from one budget.
+
+    Call before TensorFlow is imported (i.e. before importing src.Main or
+    src.emotion_detector): TensorFlow thread pools cannot be resized afterwards.
+
+    Parameters:
+        total (int): Number of cores to use (0 = all physical cores)
+        affinity (bool): Pin the process to the first `total` logical cores
+        **overrides: opencv_threads, tf_intra_op_threads, tf_inter_op_threads (0 = from budget)
+
+    Returns:
+        dict: Applied thread layout
+    """
+    global _layout
+    layout = plan_thread_budget(total, **overrides)
+
+    # Environment for TensorFlow / OpenMP / MKL thread pools created later
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(layout['tf_intra_op'])
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(layout['tf_inter_op'])
+    os.environ['OMP_NUM_THREADS'] = str(layout['tf_intra_op'])
+
+    cv2.setNumThreads(layout['opencv'])
+
+    # TensorFlow already imported: set the pools directly if it is not initialized yet
+    tf = sys.modules.get('tensorflow')
+    if tf is not None:
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(layout['tf_intra_op'])
+            tf.config.threading.set_inter_op_parallelism_threads(layout['tf_inter_op'])
+        except RuntimeError as e:
+            print(f"TensorFlow threads already initialized: {e}")
+
+    layout['affinity'] = None
+    if affinity:
+        try:
+            cpus = list(range(layout['cores']))
+            psutil.Process().cpu_affinity(cpus)
+            layout['affinity'] = cpus
+        except (AttributeError, psutil.Error, OSError) as e:
+            # cpu_affinity is not available on macOS
+            print(f"Cannot set CPU affinity: {e}")
+
+    _layout = layout
+    print(f"Thread budget: {format_layout(layout)}")
+    return layout
+
+def get_thread_layout():
+    """Return the applied thread layout, or None if apply_thread_budget was not called."""
+    return _layout
+
+def format_layout(layout):
+    """Format a thread layout for display."""
+    text = (f"{layout['cores']} cores - GUI {layout['gui']}, OpenCV {layout['opencv']}, "
+            f"TensorFlow {layout['tf_intra_op']} intra-op / {layout['tf_inter_op']} inter-op")
+    if layout.get('affinity'):
+        text += f", pinned to CPUs {layout['affinity'][0]}-{layout['affinity'][-1]}"
+    return text
@@ -0,0 +1,160 @@
+# coding=utf-8
+import os
+import json
+import time
+import itertools
+import threading
+from collections import deque
+
+from src import config as co
+
+class _Span:
+    """Context manager recording one span into a FrameTracer."""
+
+    __slots__ = ('_tracer', '_name', '_frame_id', '_args', '_start')
+
+    def __init__(self, tracer, name, frame_id, args):
+        self._tracer = tracer
+        self._name = name
+        self._frame_id = frame_id
+        self._args = args
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._tracer.add(self._name, self._frame_id, self._start, time.perf_counter(), **self._args)
+        return False
+
+class _NullSpan:
+    """Span used when tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class FrameTracer:
+    """
+    Low-overhead recorder of per-frame processing spans.
+
+    Spans are kept in a fixed-size ring buffer (oldest spans are overwritten)
+    and can be dumped as a Chrome/Perfetto trace file (chrome://tracing, ui.perfetto.dev).
+
+    tracer = get_tracer()
+    frame_id = tracer.next_frame_id()
+    with tracer.span("detection", frame_id):
+        ...
+    tracer.dump("trace.json")
+    """
+
+    def __init__(self, capacity=co.TRACE_BUFFER_SIZE, enabled=co.TRACE_ENABLED):
+        """
+        Initialize the tracer.
+
+        Parameters:
+            capacity (int): Maximum number of spans kept in the ring buffer
+            enabled (bool): Record spans (if False, span() is a no-op)
+        """
+        self.enabled = enabled
+        self._events = deque(maxlen=capacity)
+        self._frame_ids = itertools.count(1)
+        self._thread_names = {}
+
+    def next_frame_id(self):
+        """Return a new unique frame ID."""
+        return next(self._frame_ids)
+
+    def span(self, name, frame_id=None, **args):
+        """
+        Context manager recording the duration of a processing stage.
+
+        Parameters:
+            name (str): Stage name
+            frame_id (int): Frame the stage belongs to
+            **args: Extra values stored with the span (e.g. face index)
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, frame_id, args)
+
+    def add(self, name, frame_id, start, end, **args):
+        """
+        Record a span on the calling thread.
+
+        Parameters:
+            name (str): Stage name
+            frame_id (int): Frame the stage belongs to
+            start (float): Start time from time.perf_counter()
+            end (float): End time from time.perf_counter()
+        """
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        self._thread_names[thread.ident] = thread.name
+        self._events.append(('X', name, frame_id, start, end, thread.ident, args))
+
+    def add_frame(self, frame_id, start, end):
+        """
+        Record the whole lifetime of a frame (capture to display), which spans several threads.
+
+        Parameters:
+            frame_id (int): Frame ID
+            start (float): Capture start time from time.perf_counter()
+            end (float): Display end time from time.perf_counter()
+        """
+        if not self.enabled:
+            return
+        self._events.append(('frame', 'frame', frame_id, start, end, None, {}))
+
+    def clear(self):
+        """Remove all recorded spans."""
+        self._events.clear()
+
+    def dump(self, path):
+        """
+        Write the recorded spans as a Chrome trace event file.
+
+        Parameters:
+            path (str): Output JSON file
+
+        Returns:
+            str: Path of the written file
+        """
+        events = list(self._events)
+        pid = os.getpid()
+        origin = min((event[3] for event in events), default=0.0)
+
+        trace_events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in list(self._thread_names.items())
+        ]
+        for kind, name, frame_id, start, end, tid, args in events:
+            ts = (start - origin) * 1e6
+            dur = (end - start) * 1e6
+            if kind == 'frame':
+                # Async span so a frame can cross the capture and GUI threads
+                trace_events.append({'name': name, 'cat': 'frame', 'ph': 'b', 'id': frame_id, 'pid': pid, 'tid': 0, 'ts': ts,
+                                     'args': {'frame_id': frame_id, 'latency_ms': dur / 1000}})
+                trace_events.append({'name': name, 'cat': 'frame', 'ph': 'e', 'id': frame_id, 'pid': pid, 'tid': 0, 'ts': ts + dur})
+            else:
+                trace_events.append({'name': name, 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': tid, 'ts': ts, 'dur': dur,
+                                     'args': dict(args, frame_id=frame_id)})
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+        print(f"Trace saved: {path} ({len(events)} spans)")
+        return path
+
+_tracer = None
+
+def get_tracer():
+    """Return the application-wide FrameTracer."""
+    global _tracer
+    if _tracer is None:
+        _tracer = FrameTracer()
+    return _tracer
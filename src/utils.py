@@ -75,3 +75,34 @@ def resize_frame(frame, max_width=800, max_height=600):
         return cv2.resize(frame, (new_width, new_height))
     
     return frame
+
+def format_session_summary(summary, max_faces=3):
+    """
+    Format session statistics for display.
+    
+    Parameters:
+        summary (dict): Output of SessionStats.summary()
+        max_faces (int): Maximum number of faces listed
+        
+    Returns:
+        str: Formatted summary string
+    """
+    faces = summary['faces']
+    if not faces:
+        return "No emotions recorded yet"
+    
+    # Faces seen most often first
+    ordered = sorted(faces.items(), key=lambda item: item[1]['samples'], reverse=True)
+    lines = []
+    for track_id, face in ordered[:max_faces]:
+        seconds = face['seconds_per_emotion']
+        top = sorted(seconds.items(), key=lambda item: item[1], reverse=True)[:3]
+        times = ", ".join(f"{emotion} {int(value // 60)}:{int(value % 60):02d}" for emotion, value in top if value > 0)
+        
+        recent = face['rolling_average'].get('10s')
+        recent_text = max(recent, key=recent.get) if recent else face['current_emotion']
+        
+        lines.append(f"Face {track_id}: now {recent_text}, {face['transition_count']} changes")
+        if times:
+            lines.append(f"  {times}")
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+# coding=utf-8
+import queue
+from threading import Thread
+
+import cv2
+
+class VideoRecorder:
+    """
+    Write frames to a video file on a dedicated thread.
+
+    Frames are handed over through a bounded queue so encoding never blocks the
+    capture/inference loop. If the encoder falls behind, new frames are dropped
+    and counted instead of waiting.
+
+    recorder = VideoRecorder("session.mp4", fps=10)
+    recorder.write(frame)
+    recorder.close()
+    """
+
+    def __init__(self, path, fps, fourcc="mp4v", queue_size=64):
+        """
+        Initialize the recorder and start its writer thread.
+
+        Parameters:
+            path (str): Output video file
+            fps (float): Frame rate stored in the video file
+            fourcc (str): Four character codec code for cv2.VideoWriter
+            queue_size (int): Maximum number of frames waiting to be encoded
+        """
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.failed = False  # The video file could not be opened
+
+        self._writer = None
+        self._frame_size = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._thread = Thread(target=self._run, name="video_writer", daemon=True)
+        self._thread.start()
+
+    def write(self, frame):
+        """
+        Queue a frame for encoding without blocking.
+
+        Parameters:
+            frame (numpy.ndarray): BGR frame (must not be modified afterwards)
+
+        Returns:
+            bool: False if the frame was dropped because the queue is full
+        """
+        if self._closed:
+            return False
+        if self.failed:
+            self.frames_dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+
+    def close(self):
+        """Encode the remaining frames, release the file and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        if self.failed:
+            print(f"Recording failed: cannot open {self.path} ({self.frames_dropped} frames dropped)")
+        else:
+            print(f"Recording saved: {self.path} ({self.frames_written} frames written, {self.frames_dropped} dropped)")
+
+    def _open(self, frame):
+        height, width = frame.shape[:2]
+        self._frame_size = (width, height)
+        self._writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, self._frame_size)
+        if not self._writer.isOpened():
+            self.failed = True
+            print(f"Cannot open video writer: {self.path}")
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                break
+            if self.failed:
+                self.frames_dropped += 1
+                continue
+            try:
+                if self._writer is None:
+                    self._open(frame)
+                    if self.failed:
+                        self.frames_dropped += 1
+                        continue
+                if frame.shape[1::-1] != self._frame_size:
+                    # Analysis resolution changed during the session
+                    frame = cv2.resize(frame, self._frame_size)
+                self._writer.write(frame)
+                self.frames_written += 1
+            except Exception as e:
+                print("Bug: ", e)
+
+        if self._writer is not None:
+            self._writer.release()
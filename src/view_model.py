@@ -0,0 +1,83 @@
+# coding=utf-8
+import threading
+
+from PyQt5 import QtCore, QtGui
+
+from src import config as co
+
+class ViewUpdater(QtCore.QObject):
+    """
+    Coalesce widget updates from worker threads into one update per display refresh.
+
+    Worker threads post the latest values of named view properties; a QTimer on
+    the GUI thread applies them at most once per screen refresh. Values equal
+    to the ones already shown are skipped, so unchanged text or style sheets do
+    not trigger relayout or style recomputation.
+
+    view = ViewUpdater(main_window)             # on the GUI thread
+    view.bind('result_text', label.setText)
+    view.post(result_text="happy", result_style="...")   # from any thread
+    """
+
+    def __init__(self, parent=None, refresh_rate=None):
+        """
+        Parameters:
+            parent (QObject): Parent object (the timer runs on its thread, i.e. the GUI thread)
+            refresh_rate (float): Updates per second (None = primary screen refresh rate)
+        """
+        super(ViewUpdater, self).__init__(parent)
+        self._setters = {}
+        self._diff = {}
+        self._shown = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        if refresh_rate is None:
+            screen = QtGui.QGuiApplication.primaryScreen()
+            refresh_rate = screen.refreshRate() if screen is not None else 0
+        self.refresh_rate = refresh_rate if refresh_rate and refresh_rate > 0 else co.UI_REFRESH_RATE
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(max(1, int(1000 / self.refresh_rate)))
+
+    def bind(self, name, setter, diff=True):
+        """
+        Register the setter applying a view property.
+
+        Parameters:
+            name (str): Property name used in post()
+            setter (callable): Called on the GUI thread with the new value (tuples are unpacked)
+            diff (bool): Skip values equal to the one already shown
+        """
+        self._setters[name] = setter
+        self._diff[name] = diff
+
+    def post(self, **values):
+        """Set the latest value of view properties (thread-safe; older pending values are replaced)."""
+        with self._lock:
+            self._pending.update(values)
+
+    def flush(self):
+        """Apply the pending values (GUI thread)."""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+
+        for name, value in pending.items():
+            setter = self._setters.get(name)
+            if setter is None:
+                continue
+            if self._diff[name] and name in self._shown and self._shown[name] == value:
+                continue
+            try:
+                if isinstance(value, tuple):
+                    setter(*value)
+                else:
+                    setter(value)
+                if self._diff[name]:
+                    self._shown[name] = value
+            except Exception as e:
+                print("Bug: ", e)